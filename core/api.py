@@ -0,0 +1,274 @@
+"""
+Read-only JSON API, version 1, for the mobile client and integrations.
+
+    GET /api/v1/jobs/                       open jobs, newest first (?skill=)
+    GET /api/v1/jobs/<id>/                  one job
+    GET /api/v1/jobs/<id>/proposals/        all proposals for the job's owner, your own otherwise
+    GET /api/v1/threads/                    your message threads
+    GET /api/v1/threads/<id>/messages/      a thread's messages, newest first
+
+Lists are keyset-paginated: follow `next` (or pass `?after=<cursor>`), with
+`?limit=` up to MAX_LIMIT. `?fields=id,title` returns only those fields, and
+only the joins and prefetches those fields need are run.
+
+Every response carries a strong ETag and Last-Modified derived from the
+fragment cache versions the resource depends on, so a conditional request
+for an unchanged resource gets a 304 before anything is queried or
+serialized. Usernames are treated as immutable.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from .fragments import OPEN_JOBS_VERSION, current_versions, token_time
+from .models import Job, Message, Proposal, Thread
+from .pagination import KeysetPaginator
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class Field:
+    """
+    How to read one API field, and what it costs: the model columns it needs
+    for .only(), plus the relations to select_related or prefetch_related.
+    """
+
+    def __init__(self, getter, columns=(), select=(), prefetch=()):
+        self.getter = getter
+        self.columns = columns
+        self.select = select
+        self.prefetch = prefetch
+
+
+def simple(name, convert=None):
+    if convert is None:
+        return Field(lambda obj: getattr(obj, name), columns=(name,))
+    return Field(lambda obj: None if getattr(obj, name) is None else convert(getattr(obj, name)), columns=(name,))
+
+
+def isoformat(value):
+    return value.isoformat()
+
+
+def file_url(name):
+    return Field(lambda obj: getattr(obj, name).url if getattr(obj, name) else None, columns=(name,))
+
+
+JOB_FIELDS = {
+    'id': simple('id'),
+    'title': simple('title'),
+    'description': simple('description'),
+    'budget': simple('budget', str),
+    'skills_required': simple('skills_required'),
+    'skills': Field(lambda job: [skill.slug for skill in job.skill_tags.all()], prefetch=('skill_tags',)),
+    'client': Field(lambda job: job.client.username, columns=('client__username',), select=('client',)),
+    'is_open': simple('is_open'),
+    'status': simple('status'),
+    'created_at': simple('created_at', isoformat),
+    'url': Field(lambda job: reverse('api_job', args=[job.pk])),
+}
+
+PROPOSAL_FIELDS = {
+    'id': simple('id'),
+    'job': Field(lambda proposal: proposal.job_id, columns=('job',)),
+    'freelancer': Field(lambda proposal: proposal.freelancer.username, columns=('freelancer__username',),
+                        select=('freelancer',)),
+    'rate': simple('rate', str),
+    'status': simple('status'),
+    'cover_letter': simple('cover_letter'),
+    'attachment': file_url('attachment'),
+    'attachment_name': simple('attachment_name'),
+    'created_at': simple('created_at', isoformat),
+}
+
+THREAD_FIELDS = {
+    'id': simple('id'),
+    'job': Field(lambda thread: {'id': thread.job_id, 'title': thread.job.title}, columns=('job__title',),
+                 select=('job',)),
+    'client': Field(lambda thread: thread.client.username, columns=('client__username',), select=('client',)),
+    'freelancer': Field(lambda thread: thread.freelancer.username, columns=('freelancer__username',),
+                        select=('freelancer',)),
+    'messages_url': Field(lambda thread: reverse('api_thread_messages', args=[thread.pk])),
+}
+
+MESSAGE_FIELDS = {
+    'id': simple('id'),
+    'sender': Field(lambda message: message.sender.username, columns=('sender__username',), select=('sender',)),
+    'body': simple('body'),
+    'file': file_url('file'),
+    'file_name': simple('file_name'),
+    'timestamp': simple('timestamp', isoformat),
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def api_view(view):
+    """GET/HEAD only; JSON errors instead of login redirects and HTML error pages."""
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        try:
+            response = view(request, *args, **kwargs)
+        except Http404:
+            return JsonResponse({'error': 'Not found.'}, status=404)
+        except BadRequest as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+        patch_vary_headers(response, ['Cookie'])
+        # Cached copies must be revalidated, which the ETag makes cheap
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return wrapper
+
+
+def requested_fields(request, fields):
+    value = request.GET.get('fields')
+    if not value:
+        return list(fields)
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in fields]
+    if unknown:
+        raise BadRequest(f'Unknown fields: {", ".join(unknown)}. Available: {", ".join(fields)}.')
+    return names
+
+
+def plan(queryset, fields, names, ordering=()):
+    """Applies the columns, joins and prefetches the requested fields need."""
+    columns = {'id', *(name.lstrip('-') for name in ordering)}
+    select, prefetch = set(), set()
+    for name in names:
+        columns.update(fields[name].columns)
+        select.update(fields[name].select)
+        prefetch.update(fields[name].prefetch)
+    queryset = queryset.only(*columns)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+def serialize(obj, fields, names):
+    return {name: fields[name].getter(obj) for name in names}
+
+
+def page_limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise BadRequest('limit must be a number.') from None
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def not_modified(request, version_keys, per_user=False):
+    """
+    (response, headers): a 304 (or 412) response when the client's copy is
+    current, else None, plus the validators to send with either. The ETag
+    hashes the versions with the full path, so every page and field
+    selection has its own.
+    """
+    versions = current_versions(version_keys)
+    parts = [versions[key] for key in version_keys] + [request.get_full_path()]
+    if per_user:
+        parts.append(str(request.user.pk))
+    etag = '"%s"' % hashlib.sha256('\n'.join(parts).encode()).hexdigest()[:32]
+    times = [token_time(versions[key]) for key in version_keys]
+    last_modified = max(times) if None not in times else None
+    # Token times are whole seconds: a change later in the same second would
+    # keep the date, so the date is only a validator once that second is over
+    if last_modified is not None and last_modified >= int(time.time()):
+        last_modified = None
+    headers = {'ETag': etag}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        for name, value in headers.items():
+            response[name] = value
+    return response, headers
+
+
+def respond(data, headers):
+    response = JsonResponse(data)
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def list_response(request, queryset, fields, version_keys, ordering=('-created_at', '-id'), per_user=False):
+    names = requested_fields(request, fields)
+    limit = page_limit(request)
+    response, headers = not_modified(request, version_keys, per_user)
+    if response is not None:
+        return response
+    queryset = plan(queryset, fields, names, ordering)
+    page = KeysetPaginator(queryset, limit, ordering=ordering).page(request.GET.get('after'))
+    next_url = None
+    if page.has_next:
+        query = request.GET.copy()
+        query['after'] = page.next_cursor
+        next_url = request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+    return respond({'results': [serialize(obj, fields, names) for obj in page], 'next': next_url}, headers)
+
+
+# --- Endpoints ---
+
+@api_view
+def job_feed(request):
+    jobs = Job.objects.filter(is_open=True)
+    skill = request.GET.get('skill')
+    if skill:
+        jobs = jobs.filter(skill_tags__slug=skill)
+    return list_response(request, jobs, JOB_FIELDS, [OPEN_JOBS_VERSION])
+
+
+@api_view
+def job_detail(request, pk):
+    names = requested_fields(request, JOB_FIELDS)
+    # Deleting the job bumps its version too, so a 304 never hides a 404
+    response, headers = not_modified(request, [f'v:job:{pk}'])
+    if response is not None:
+        return response
+    job = plan(Job.objects.filter(pk=pk), JOB_FIELDS, names).first()
+    if job is None:
+        raise Http404
+    return respond(serialize(job, JOB_FIELDS, names), headers)
+
+
+@api_view
+def job_proposals(request, pk):
+    client_id = Job.objects.filter(pk=pk).values_list('client_id', flat=True).first()
+    if client_id is None:
+        raise Http404
+    proposals = Proposal.objects.filter(job_id=pk)
+    if client_id != request.user.pk:
+        proposals = proposals.filter(freelancer=request.user)
+    return list_response(request, proposals, PROPOSAL_FIELDS, [f'v:job:{pk}'], per_user=True)
+
+
+@api_view
+def thread_list(request):
+    threads = Thread.objects.filter(client=request.user) | Thread.objects.filter(freelancer=request.user)
+    # Threads show their job's title, so job edits count as changes too
+    return list_response(request, threads, THREAD_FIELDS, [f'v:threads:{request.user.pk}', OPEN_JOBS_VERSION],
+                         ordering=('-id',), per_user=True)
+
+
+@api_view
+def thread_messages(request, pk):
+    participants = Thread.objects.filter(pk=pk).values_list('client_id', 'freelancer_id').first()
+    if participants is None or request.user.pk not in participants:
+        raise Http404
+    return list_response(request, Message.objects.filter(thread_id=pk), MESSAGE_FIELDS, [f'v:thread:{pk}'],
+                         ordering=('-timestamp', '-id'))
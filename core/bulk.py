@@ -0,0 +1,282 @@
+import codecs
+import csv
+import json
+from dataclasses import dataclass, field
+
+from django import forms
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from .forms import JobForm, ProfileUpdateForm
+from .fragments import OPEN_JOBS_VERSION, invalidate
+from .models import Job, Profile
+from .search import get_search_backend
+from .skills import get_or_create_skills, parse_skills
+
+FORMATS = ('csv', 'jsonl')
+IMPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_SIZE = 2000
+
+JOB_EXPORT_FIELDS = ['id', 'client', 'title', 'description', 'budget', 'skills_required', 'is_open', 'status',
+                     'created_at']
+PROFILE_EXPORT_FIELDS = ['username', 'email', 'role', 'title', 'bio', 'skills', 'hourly_rate', 'location',
+                         'company_name', 'rating_avg', 'rating_count']
+
+
+def guess_format(filename, default='csv'):
+    for fmt in FORMATS:
+        if filename and filename.lower().endswith('.' + fmt):
+            return fmt
+    return default
+
+
+# --- Reading ---
+
+def iter_records(stream, fmt):
+    """
+    Yields (line number, dict or None) from a binary stream one record at a
+    time. None marks a line that is not a JSON object.
+    """
+    text = codecs.getreader('utf-8-sig')(stream)
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        return
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield number, record if isinstance(record, dict) else None
+
+
+def form_data(record):
+    # JSON numbers and nulls arrive typed; forms expect what a POST would carry
+    return {key: '' if value is None else str(value) for key, value in record.items()}
+
+
+def string_value(record, key):
+    """The record's `key` if it is a string, else None; JSON can carry lists and objects."""
+    value = record.get(key)
+    return value if isinstance(value, str) else None
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, errors):
+        self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {'created': self.created, 'failed': len(self.errors), 'errors': self.errors}
+
+
+def batched(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def link_skills(instances, text_attr):
+    """Creates the skill_tags rows of freshly bulk-created instances in bulk."""
+    model = type(instances[0])
+    through = model.skill_tags.through
+    pairs = {}
+    parsed = [(instance, parse_skills(getattr(instance, text_attr))) for instance in instances]
+    for _, instance_pairs in parsed:
+        pairs.update(instance_pairs)
+    skills = {skill.slug: skill.pk for skill in get_or_create_skills(list(pairs.items()))}
+    owner = f'{model._meta.model_name}_id'
+    through.objects.bulk_create([
+        through(**{owner: instance.pk, 'skill_id': skills[slug]})
+        for instance, instance_pairs in parsed for slug, _ in instance_pairs
+    ])
+
+
+# --- Jobs ---
+
+def import_jobs(stream, fmt, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Imports jobs validated with JobForm; `client` holds the owner's username.
+    Each batch of valid rows is written with one bulk_create in its own
+    transaction, so rows before a failing batch stay imported.
+    """
+    report = ImportReport()
+    for batch in batched(iter_records(stream, fmt), batch_size):
+        usernames = {string_value(record, 'client') for _, record in batch if record} - {None}
+        clients = dict(User.objects.filter(username__in=usernames, profile__role='client')
+                       .values_list('username', 'pk'))
+        jobs = []
+        for line, record in batch:
+            if record is None:
+                report.add_error(line, {'__all__': ['Not a JSON object.']})
+                continue
+            form = JobForm(data=form_data(record))
+            errors = dict(form.errors) if not form.is_valid() else {}
+            client = string_value(record, 'client')
+            if client is None:
+                errors['client'] = ['Must be a username.']
+            elif client not in clients:
+                errors['client'] = ['Unknown client username.']
+            if errors:
+                report.add_error(line, {name: list(messages) for name, messages in errors.items()})
+                continue
+            job = form.save(commit=False)
+            job.client_id = clients[client]
+            jobs.append(job)
+        if jobs:
+            save_jobs(jobs)
+            report.created += len(jobs)
+    return report
+
+
+def save_jobs(jobs):
+    # bulk_create skips post_save, so the receivers' work is done here in bulk
+    backend = get_search_backend()
+    with transaction.atomic():
+        Job.objects.bulk_create(jobs)
+        link_skills(jobs, 'skills_required')
+        for job in jobs:
+            backend.index_job(job)
+        invalidate(OPEN_JOBS_VERSION, *{f'v:profile:{job.client_id}' for job in jobs})
+
+
+def export_jobs():
+    rows = Job.objects.order_by('pk').values_list(
+        'pk', 'client__username', 'title', 'description', 'budget', 'skills_required', 'is_open', 'status',
+        'created_at',
+    )
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield dict(zip(JOB_EXPORT_FIELDS, row))
+
+
+# --- Profiles ---
+
+def validate_username(username, taken):
+    if username is None:
+        return ['Must be a string.']
+    field = User._meta.get_field('username')
+    try:
+        field.clean(username, None)
+    except ValidationError as exc:
+        return exc.messages
+    if username in taken:
+        return ['A user with that username already exists.']
+    return None
+
+
+def validate_email(record):
+    email = record.get('email')
+    if email is None:
+        return None
+    if not isinstance(email, str):
+        return ['Must be a string.']
+    try:
+        forms.EmailField(required=False).clean(email)
+    except ValidationError as exc:
+        return exc.messages
+    return None
+
+
+def import_profiles(stream, fmt, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Onboards users with their profiles: `username`, optional `email`, `role`
+    and the ProfileUpdateForm fields (pictures cannot be imported). Accounts
+    are created without a usable password; people set one through password
+    reset.
+    """
+    report = ImportReport()
+    for batch in batched(iter_records(stream, fmt), batch_size):
+        usernames = {string_value(record, 'username') for _, record in batch if record} - {None}
+        taken = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        users, profiles = [], []
+        for line, record in batch:
+            if record is None:
+                report.add_error(line, {'__all__': ['Not a JSON object.']})
+                continue
+            data = form_data(record)
+            form = ProfileUpdateForm(data=data, instance=Profile(role=data.get('role', '')))
+            errors = dict(form.errors) if not form.is_valid() else {}
+            username = record.get('username', '')
+            username_errors = validate_username(username if isinstance(username, str) else None, taken)
+            if username_errors:
+                errors['username'] = username_errors
+            email_errors = validate_email(record)
+            if email_errors:
+                errors['email'] = email_errors
+            if data.get('role') not in dict(Profile.role_choices):
+                errors['role'] = ['Must be one of: ' + ', '.join(dict(Profile.role_choices)) + '.']
+            if errors:
+                report.add_error(line, {name: list(messages) for name, messages in errors.items()})
+                continue
+            taken.add(data['username'])
+            users.append(User(username=data['username'], email=data.get('email', ''), password=make_password(None)))
+            profiles.append(form.save(commit=False))
+        if users:
+            save_profiles(users, profiles)
+            report.created += len(users)
+    return report
+
+
+def save_profiles(users, profiles):
+    backend = get_search_backend()
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        for user, profile in zip(users, profiles):
+            profile.user = user
+        Profile.objects.bulk_create(profiles)
+        link_skills(profiles, 'skills')
+        for profile in profiles:
+            backend.index_profile(profile)
+
+
+def export_profiles():
+    rows = Profile.objects.order_by('pk').values_list(
+        'user__username', 'user__email', 'role', 'title', 'bio', 'skills', 'hourly_rate', 'location',
+        'company_name', 'rating_avg', 'rating_count',
+    )
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield dict(zip(PROFILE_EXPORT_FIELDS, row))
+
+
+# --- Writing ---
+
+class Echo:
+    """A file-like object that hands back what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def serialize(records, fields, fmt):
+    """Yields the export one line at a time."""
+    if fmt == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        for record in records:
+            yield writer.writerow(['' if record[name] is None else record[name] for name in fields])
+        return
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder) + '\n'
+
+
+IMPORTERS = {'jobs': import_jobs, 'profiles': import_profiles}
+EXPORTERS = {'jobs': (export_jobs, JOB_EXPORT_FIELDS), 'profiles': (export_profiles, PROFILE_EXPORT_FIELDS)}
+
+
+def export_lines(kind, fmt):
+    records, fields = EXPORTERS[kind]
+    return serialize(records(), fields, fmt)
@@ -0,0 +1,9 @@
+from .notifications import unread_count
+
+
+def notifications(request):
+    # A callable, so only templates that show the badge pay for the cache read
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {'unread_notifications': 0}
+    return {'unread_notifications': lambda: unread_count(user)}
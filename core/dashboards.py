@@ -0,0 +1,77 @@
+from django.db.models import Count, Prefetch, Q
+
+from .models import Job, Proposal, Thread
+from .pagination import KeysetPaginator
+
+DASHBOARD_PAGE_SIZE = 20
+
+CLIENT_JOB_FILTERS = {
+    'open': {'is_open': True},
+    'in_progress': {'is_open': False, 'status': 'active'},
+    'completed': {'status': 'completed'},
+}
+
+
+def proposal_count(status=None):
+    """Counts a job's proposals, or those in `status`, in the page query's one GROUP BY."""
+    return Count('proposals', filter=Q(proposals__status=status) if status else None)
+
+
+def client_jobs_page(user, status=None, cursor=None, page_size=DASHBOARD_PAGE_SIZE):
+    """
+    One keyset page of a client's jobs, each annotated with proposal counts by
+    status and carrying `accepted_proposals`, whose items have `.thread` set.
+    Costs three queries whatever the number of jobs or proposals.
+    """
+    jobs = Job.objects.filter(client=user, **CLIENT_JOB_FILTERS.get(status, {})).annotate(
+        proposal_count=proposal_count(),
+        pending_count=proposal_count('pending'),
+        accepted_count=proposal_count('accepted'),
+        rejected_count=proposal_count('rejected'),
+    ).prefetch_related(
+        Prefetch(
+            'proposals',
+            queryset=Proposal.objects.filter(status='accepted').select_related('freelancer'),
+            to_attr='accepted_proposals',
+        ),
+        Prefetch('thread_set', queryset=Thread.objects.only('id', 'job_id', 'freelancer_id'), to_attr='threads'),
+    )
+    page = KeysetPaginator(jobs, page_size).page(cursor)
+
+    for job in page:
+        threads = {thread.freelancer_id: thread for thread in job.threads}
+        for proposal in job.accepted_proposals:
+            proposal.thread = threads.get(proposal.freelancer_id)
+    return page
+
+
+def freelancer_status_counts(user):
+    """Proposal counts per status plus a total, from one grouped query."""
+    counts = {status: 0 for status, _ in Proposal.STATUS_CHOICES}
+    rows = Proposal.objects.filter(freelancer=user).order_by().values_list('status').annotate(total=Count('pk'))
+    for status, total in rows:
+        counts[status] = total
+    counts['all'] = sum(counts.values())
+    return counts
+
+
+def freelancer_proposals_page(user, status=None, cursor=None, page_size=DASHBOARD_PAGE_SIZE):
+    """
+    One keyset page of a freelancer's proposals with their job and client
+    joined in. Accepted proposals get `.thread` from a single bulk lookup.
+    """
+    proposals = Proposal.objects.filter(freelancer=user).select_related('job__client')
+    if status in dict(Proposal.STATUS_CHOICES):
+        proposals = proposals.filter(status=status)
+    page = KeysetPaginator(proposals, page_size).page(cursor)
+
+    accepted_job_ids = [proposal.job_id for proposal in page if proposal.status == 'accepted']
+    threads = {}
+    if accepted_job_ids:
+        threads = {
+            thread.job_id: thread
+            for thread in Thread.objects.filter(freelancer=user, job_id__in=accepted_job_ids).only('id', 'job_id')
+        }
+    for proposal in page:
+        proposal.thread = threads.get(proposal.job_id)
+    return page
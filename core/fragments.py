@@ -0,0 +1,106 @@
+import hashlib
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Model
+
+# Bumped whenever a job is created, edited, closed or deleted: the feed of open
+# jobs and everything derived from it (recommendations, the API feed) depend on it
+OPEN_JOBS_VERSION = 'v:jobs'
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def fragment_cache():
+    return caches[settings.FRAGMENT_CACHE_ALIAS]
+
+
+def version_key(obj):
+    """
+    The version a cached fragment depends on. Profiles are keyed by user id so
+    reviews and jobs can invalidate them without loading the profile row.
+    """
+    model_name = obj._meta.model_name
+    if model_name == 'profile':
+        return f'v:profile:{obj.user_id}'
+    if model_name == 'user':
+        return f'v:profile:{obj.pk}'
+    return f'v:{model_name}:{obj.pk}'
+
+
+def new_token():
+    # Random tokens instead of counters: if a version key is evicted, the
+    # replacement can never collide with a fragment rendered under the old one.
+    # The prefix records when the version started, for Last-Modified headers.
+    return f'{int(time.time())}.{uuid.uuid4().hex}'
+
+
+def token_time(token):
+    """The Unix time a version token was made, or None for a malformed one."""
+    try:
+        return int(token.split('.', 1)[0])
+    except (AttributeError, ValueError):
+        return None
+
+
+def bump(*keys):
+    fragment_cache().set_many({key: new_token() for key in keys}, timeout=None)
+
+
+def invalidate(*keys):
+    """
+    Bumps now, for readers inside this transaction, and again after commit,
+    so a concurrent request that rendered the pre-commit state under the first
+    new version cannot keep serving it.
+    """
+    bump(*keys)
+    transaction.on_commit(lambda: bump(*keys))
+
+
+def current_versions(keys):
+    """The current token of each version key, creating the missing ones."""
+    cache = fragment_cache()
+    versions = cache.get_many(keys) if keys else {}
+    missing = {key: new_token() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return versions
+
+
+def fragment_key(name, dependencies):
+    """
+    Builds the cache key of a fragment from its name, the current versions of
+    the model instances it depends on, and any plain values (page numbers...).
+    """
+    versions = current_versions([version_key(dep) for dep in dependencies if isinstance(dep, Model)])
+
+    parts = [name]
+    for dep in dependencies:
+        parts.append(versions[version_key(dep)] if isinstance(dep, Model) else str(dep))
+    return 'frag:' + hashlib.md5(':'.join(parts).encode()).hexdigest()
+
+
+def get_or_render(name, dependencies, render):
+    cache = fragment_cache()
+    key = fragment_key(name, dependencies)
+    content = cache.get(key)
+    hit = content is not None
+    with _stats_lock:
+        _stats['hits' if hit else 'misses'] += 1
+    if not hit:
+        content = render()
+        cache.set(key, content)
+    return content
+
+
+def stats():
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': round(hits / total, 3) if total else None}
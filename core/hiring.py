@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Case, Q, Value, When
+
+from .fragments import OPEN_JOBS_VERSION, invalidate
+from .models import Job, Proposal, Thread
+from .search import get_search_backend
+
+
+class ProposalNotAcceptable(Exception):
+    """The proposal's job is closed, gone, or not owned by the caller."""
+
+
+@dataclass
+class Acceptance:
+    proposal: Proposal
+    thread: Thread
+    rejected: int
+
+
+def accept_proposal(proposal, client):
+    """
+    Hires `proposal`'s freelancer for `client`'s job in one transaction: closes
+    the job, accepts this proposal, rejects the other pending ones and opens
+    the message thread.
+
+    Closing the job is a conditional UPDATE (`is_open` acts as the version
+    column), so of two concurrent accepts for one job exactly one gets a row
+    back and the other raises ProposalNotAcceptable. It is also the first
+    statement of the transaction, so the row lock it takes (PostgreSQL, MySQL)
+    or SQLite's write lock is held from the start: the second writer waits
+    for the first to commit, then sees the job closed, instead of deadlocking
+    on a lock upgrade.
+    """
+    job_id = proposal.job_id
+    with transaction.atomic():
+        closed = Job.objects.filter(pk=job_id, client=client, is_open=True).update(is_open=False)
+        if not closed:
+            raise ProposalNotAcceptable('This job is no longer open for hiring.')
+
+        # Accept this one and reject the other pending ones in one statement
+        updated = Proposal.objects.filter(Q(pk=proposal.pk) | Q(status='pending'), job_id=job_id).update(
+            status=Case(When(pk=proposal.pk, then=Value('accepted')), default=Value('rejected')),
+        )
+        thread, _ = Thread.objects.get_or_create(job_id=job_id, client=client, freelancer_id=proposal.freelancer_id)
+
+        # Queryset updates skip post_save, so do what its receivers would have
+        invalidate(f'v:job:{job_id}', f'v:profile:{client.pk}', OPEN_JOBS_VERSION)
+        get_search_backend().remove_job(job_id)
+
+    proposal.status = 'accepted'
+    return Acceptance(proposal=proposal, thread=thread, rejected=updated - 1)
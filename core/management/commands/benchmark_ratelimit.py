@@ -0,0 +1,50 @@
+# core/management/commands/benchmark_ratelimit.py
+import time
+import uuid
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from core.ratelimit import CacheStore, LocalMemoryStore, client_key, parse_rate
+
+
+class Command(BaseCommand):
+    help = 'Times a rate limit check (client key plus bucket update) against each counter store.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100_000)
+        parser.add_argument('--clients', type=int, default=1000,
+                            help='Distinct client IPs the requests are spread over.')
+        parser.add_argument('--cache', action='append', default=[],
+                            help='Also time CacheStore on this cache alias (repeatable).')
+        parser.add_argument('--cache-iterations', type=int, default=5000,
+                            help='Checks per CacheStore, which can be much slower than local memory.')
+
+    def time_store(self, store, requests, iterations):
+        # Generous enough that every check is allowed, as almost all are in production
+        rate = parse_rate('1000000/s')
+        # A fresh scope per run; the buckets expire on their own within a second
+        scope = f'benchmark-{uuid.uuid4().hex[:8]}'
+        start = time.perf_counter()
+        for i in range(iterations):
+            request = requests[i % len(requests)]
+            store.hit(f'{scope}:{client_key(request)}', rate)
+        return (time.perf_counter() - start) / iterations * 1_000_000
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        requests = []
+        for i in range(options['clients']):
+            request = factory.post('/search/', REMOTE_ADDR=f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}')
+            request.user = AnonymousUser()
+            requests.append(request)
+
+        stores = [('LocalMemoryStore', LocalMemoryStore(), options['iterations'])]
+        stores += [(f'CacheStore({alias})', CacheStore(alias), options['cache_iterations'])
+                   for alias in ['default', *options['cache']]]
+        self.stdout.write(f'{"store":<32}{"checks":>10}{"us/check":>12}{"checks/s":>14}')
+        for name, store, iterations in stores:
+            micros = self.time_store(store, requests, iterations)
+            self.stdout.write(f'{name:<32}{iterations:>10}{micros:>12.2f}{1_000_000 / micros:>14,.0f}')
+        self.stdout.write(self.style.SUCCESS(f'Benchmark complete ({options["clients"]} clients).'))
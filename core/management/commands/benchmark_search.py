@@ -0,0 +1,41 @@
+# core/management/commands/benchmark_search.py
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.search import DatabaseSearchBackend, SQLiteFTSBackend
+
+DEFAULT_QUERIES = ['django', 'python developer', 'react', 'design', 'aws cloud', 'writer']
+
+
+class Command(BaseCommand):
+    help = 'Times the FTS5 search backend against the icontains backend on the current database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*', default=DEFAULT_QUERIES)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=12)
+
+    def time_backend(self, backend, query, kind, repeat, page_size):
+        search = backend.search_talent if kind == 'talent' else backend.search_jobs
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = search(query)
+            results.count()
+            list(results[:page_size])
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        backends = [('icontains', DatabaseSearchBackend()), ('fts5', SQLiteFTSBackend())]
+        self.stdout.write(f'{"query":<24}{"type":<8}' + ''.join(f'{name + " ms":>14}' for name, _ in backends))
+        for query in options['queries']:
+            for kind in ('talent', 'jobs'):
+                row = f'{query:<24}{kind:<8}'
+                for _, backend in backends:
+                    median = self.time_backend(backend, query, kind, options['repeat'], options['page_size'])
+                    row += f'{median:>14.2f}'
+                self.stdout.write(row)
+        self.stdout.write(self.style.SUCCESS('Benchmark complete (median of each run, count + first page).'))
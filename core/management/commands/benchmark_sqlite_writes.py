@@ -0,0 +1,120 @@
+# core/management/commands/benchmark_sqlite_writes.py
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from core.profiling import percentile
+from jobboard.database import sqlite_options
+
+ALIAS = 'write_benchmark'
+SCHEMA = [
+    'CREATE TABLE thread (id INTEGER PRIMARY KEY, message_count INTEGER NOT NULL DEFAULT 0)',
+    'CREATE TABLE message (id INTEGER PRIMARY KEY, thread_id INTEGER NOT NULL, sender_id INTEGER NOT NULL, '
+    'body TEXT NOT NULL, timestamp REAL NOT NULL)',
+    'CREATE INDEX message_thread_ts ON message (thread_id, timestamp)',
+]
+THREADS = 50
+
+
+def open_scratch(settings_dict):
+    # Registered per process and run; Django connections are not shared across forks
+    if ALIAS in connections.settings:
+        connections[ALIAS].close()
+        del connections[ALIAS]
+    connections.settings[ALIAS] = settings_dict
+    return connections[ALIAS]
+
+
+def write_worker(args):
+    """
+    Child process: posts messages the way thread_detail does, reading the
+    thread then inserting, each in its own transaction. Returns the latency
+    of every successful write, the number of "database is locked" errors and
+    when the worker finished.
+    """
+    settings_dict, worker, writes, start_at = args
+    connection = open_scratch(settings_dict)
+    time.sleep(max(start_at - time.time(), 0))
+    latencies, errors = [], 0
+    for i in range(writes):
+        thread_id = (worker * writes + i) % THREADS + 1
+        start = time.perf_counter()
+        try:
+            with transaction.atomic(using=ALIAS), connection.cursor() as cursor:
+                cursor.execute('SELECT message_count FROM thread WHERE id = %s', [thread_id])
+                cursor.fetchone()
+                cursor.execute(
+                    'INSERT INTO message (thread_id, sender_id, body, timestamp) VALUES (%s, %s, %s, %s)',
+                    [thread_id, worker, f'message {i} from worker {worker}', time.time()],
+                )
+                cursor.execute('UPDATE thread SET message_count = message_count + 1 WHERE id = %s', [thread_id])
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+    connection.close()
+    return latencies, errors, time.time()
+
+
+class Command(BaseCommand):
+    help = ('Measures write throughput and "database is locked" errors when several processes write to '
+            'one SQLite file, with the tuned connection settings and with SQLite defaults.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8)
+        parser.add_argument('--writes', type=int, default=200, help='Transactions per process.')
+        parser.add_argument('--mode', choices=['tuned', 'default', 'both'], default='both')
+
+    def run(self, options, mode):
+        default = connections['default'].settings_dict
+        if default['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('This benchmark is for SQLite databases.')
+
+        # A scratch file per run: journal_mode=WAL sticks to the file once set
+        fd, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        settings_dict = {**default, 'NAME': path, 'OPTIONS': sqlite_options() if mode == 'tuned' else {},
+                         'TEST': {}}
+        try:
+            connection = open_scratch(settings_dict)
+            with connection.cursor() as cursor:
+                for statement in SCHEMA:
+                    cursor.execute(statement)
+                cursor.executemany('INSERT INTO thread (id) VALUES (%s)', [[i] for i in range(1, THREADS + 1)])
+            connection.close()
+
+            processes, writes = options['processes'], options['writes']
+            start_at = time.time() + 1
+            jobs = [(settings_dict, worker, writes, start_at) for worker in range(processes)]
+            with multiprocessing.get_context('fork').Pool(processes) as pool:
+                results = pool.map(write_worker, jobs)
+        finally:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+        latencies = [latency for worker_latencies, _, _ in results for latency in worker_latencies]
+        errors = sum(worker_errors for _, worker_errors, _ in results)
+        elapsed = max(finished for _, _, finished in results) - start_at
+        return {
+            'ok': len(latencies),
+            'errors': errors,
+            'per_second': len(latencies) / elapsed if elapsed > 0 else 0,
+            **{f'p{p}': percentile(latencies, p) for p in (50, 95, 99)},
+        }
+
+    def handle(self, *args, **options):
+        modes = ['default', 'tuned'] if options['mode'] == 'both' else [options['mode']]
+        self.stdout.write(f'{options["processes"]} processes x {options["writes"]} write transactions')
+        self.stdout.write(f'{"mode":<10}{"ok":>8}{"locked":>8}{"writes/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}')
+        for mode in modes:
+            result = self.run(options, mode)
+            self.stdout.write(
+                f'{mode:<10}{result["ok"]:>8}{result["errors"]:>8}{result["per_second"]:>10.0f}'
+                f'{result["p50"]:>10.2f}{result["p95"]:>10.2f}{result["p99"]:>10.2f}'
+            )
+        self.stdout.write(self.style.SUCCESS('Benchmark complete.'))
@@ -0,0 +1,90 @@
+# core/management/commands/benchmark_views.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.models import Job, Thread, Profile
+from core.profiling import RequestProfile, percentile
+
+
+class Command(BaseCommand):
+    help = ('Times the key views with the Django test client against the current database '
+            '(seed it first) and reports latency and query counts.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--save', help='Write the results as JSON to this file.')
+        parser.add_argument('--compare', help='Fail if results regress against this saved JSON file.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed p95 latency growth over the baseline, as a fraction.')
+
+    def scenarios(self):
+        """(name, user, url) for each benchmarked page, picking the busiest rows available."""
+        job = Job.objects.order_by('-pk').first()
+        thread = Thread.objects.order_by('-pk').first()
+        client_profile = Profile.objects.filter(role='client').select_related('user').order_by('pk').first()
+        freelancer_profile = (Profile.objects.filter(role='freelancer').select_related('user')
+                              .order_by('-rating_count', 'pk').first())
+        if not (job and thread and client_profile and freelancer_profile):
+            raise CommandError('Not enough data to benchmark; run `manage.py seed` first.')
+        client, freelancer = client_profile.user, freelancer_profile.user
+
+        return [
+            ('job_list', freelancer, reverse('job_list')),
+            ('job_detail', job.client, reverse('job_detail', args=[job.pk])),
+            ('dashboard (client)', client, reverse('dashboard')),
+            ('dashboard (freelancer)', freelancer, reverse('dashboard')),
+            ('search (talent)', freelancer, reverse('search') + '?q=python&search_type=talent'),
+            ('search (jobs)', freelancer, reverse('search') + '?q=django&search_type=jobs'),
+            ('thread_detail', thread.client, reverse('thread_detail', args=[thread.pk])),
+            ('profile_view', client, reverse('profile_view', args=[freelancer.username])),
+        ]
+
+    def run_scenario(self, user, url, repeat):
+        browser = Client()
+        browser.force_login(user)
+        browser.get(url)  # warm caches and connections
+        timings, queries = [], []
+        for _ in range(repeat):
+            profile = RequestProfile()
+            with profile.capture():
+                response = browser.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned {response.status_code}')
+            timings.append(profile.wall_time * 1000)
+            queries.append(profile.query_count)
+        return {'p50_ms': round(percentile(timings, 50), 2), 'p95_ms': round(percentile(timings, 95), 2),
+                'queries': max(queries)}
+
+    def handle(self, *args, **options):
+        results = {}
+        self.stdout.write(f'{"view":<26}{"p50 ms":>10}{"p95 ms":>10}{"queries":>10}')
+        # One user hitting a page --repeat times in a row is what rate limits are for
+        with override_settings(RATE_LIMIT_ENABLED=False):
+            for name, user, url in self.scenarios():
+                result = results[name] = self.run_scenario(user, url, options['repeat'])
+                self.stdout.write(
+                    f'{name:<26}{result["p50_ms"]:>10.2f}{result["p95_ms"]:>10.2f}{result["queries"]:>10}'
+                )
+
+        if options['save']:
+            with open(options['save'], 'w') as out:
+                json.dump(results, out, indent=2)
+
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)
+            regressions = []
+            for name, result in results.items():
+                before = baseline.get(name)
+                if not before:
+                    continue
+                if result['queries'] > before['queries']:
+                    regressions.append(f'{name}: {before["queries"]} -> {result["queries"]} queries')
+                if result['p95_ms'] > before['p95_ms'] * (1 + options['tolerance']):
+                    regressions.append(f'{name}: p95 {before["p95_ms"]} -> {result["p95_ms"]} ms')
+            if regressions:
+                raise CommandError('Performance regressions:\n  ' + '\n  '.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
@@ -0,0 +1,22 @@
+# core/management/commands/bulk_export.py
+from django.core.management.base import BaseCommand
+
+from core.bulk import EXPORTERS, FORMATS, export_lines, guess_format
+
+
+class Command(BaseCommand):
+    help = 'Exports all jobs or profiles as CSV or JSONL, a chunk of rows at a time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTERS))
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the output extension, else csv.')
+        parser.add_argument('--output', help='File to write; standard output if omitted.')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or guess_format(options['output'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(export_lines(options['kind'], fmt))
+        else:
+            for line in export_lines(options['kind'], fmt):
+                self.stdout.write(line, ending='')
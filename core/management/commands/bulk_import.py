@@ -0,0 +1,28 @@
+# core/management/commands/bulk_import.py
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bulk import FORMATS, IMPORT_BATCH_SIZE, IMPORTERS, guess_format
+
+
+class Command(BaseCommand):
+    help = 'Imports jobs or profiles from a CSV or JSONL file, streaming it in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension, else csv.')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or guess_format(options['path'])
+        try:
+            with open(options['path'], 'rb') as stream:
+                report = IMPORTERS[options['kind']](stream, fmt, batch_size=options['batch_size'])
+        except OSError as exc:
+            raise CommandError(str(exc))
+        for error in report.errors:
+            details = '; '.join(f'{name}: {" ".join(messages)}' for name, messages in error['errors'].items())
+            self.stderr.write(f'line {error["line"]}: {details}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.created} {options["kind"]}, {len(report.errors)} rows failed.'
+        ))
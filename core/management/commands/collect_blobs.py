@@ -0,0 +1,86 @@
+# core/management/commands/collect_blobs.py
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Blob, Message, Proposal
+from core.storage import BLOB_PREFIX, attachment_storage
+
+
+def count_references(name):
+    return Proposal.objects.filter(attachment=name).count() + Message.objects.filter(file=name).count()
+
+
+class Command(BaseCommand):
+    help = ('Recounts attachment blob references from proposals and messages, and deletes blobs '
+            'nothing points at (e.g. left behind by a failed upload).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=3600,
+                            help='Seconds since a blob was last referenced, released or written before it '
+                                 'can be corrected or collected; protects uploads whose row is not committed yet.')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def recount(self, name, cutoff, dry_run):
+        """
+        Corrects one blob's count under the write lock uploads and collect()
+        take. Returns True if it was wrong.
+        """
+        with transaction.atomic():
+            blob = Blob.objects.select_for_update().filter(name=name, updated_at__lt=cutoff).first()
+            if blob is None:
+                return False
+            count = count_references(name)
+            if count == blob.ref_count:
+                return False
+            if not dry_run:
+                Blob.objects.filter(pk=blob.pk).update(ref_count=count)
+            return True
+
+    def remove(self, name, path, cutoff, dry_run):
+        """Deletes an unreferenced blob and its file under the same lock. Returns True if it did."""
+        with transaction.atomic():
+            if Blob.objects.select_for_update().filter(name=name, updated_at__gte=cutoff).exists():
+                return False
+            if count_references(name):
+                return False
+            if not dry_run:
+                Blob.objects.filter(name=name).delete()
+                os.remove(path)
+            return True
+
+    def handle(self, *args, **options):
+        # A first pass without the lock only picks candidates; each is checked again under it
+        references = Counter(Proposal.objects.filter(attachment__startswith=BLOB_PREFIX + '/')
+                             .values_list('attachment', flat=True))
+        references.update(Message.objects.filter(file__startswith=BLOB_PREFIX + '/')
+                          .values_list('file', flat=True))
+        changed_before = timezone.now() - timedelta(seconds=options['min_age'])
+
+        fixed = 0
+        candidates = Blob.objects.filter(updated_at__lt=changed_before).values_list('name', 'ref_count')
+        for name, ref_count in candidates.iterator():
+            if ref_count != references[name] and self.recount(name, changed_before, options['dry_run']):
+                fixed += 1
+
+        cutoff = time.time() - options['min_age']
+        removed = 0
+        root = attachment_storage.path(BLOB_PREFIX)
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, attachment_storage.location).replace(os.sep, '/')
+                if references[name] or os.path.getmtime(path) > cutoff:
+                    continue
+                if self.remove(name, path, changed_before, options['dry_run']):
+                    removed += 1
+
+        prefix = '[dry run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}Corrected {fixed} reference counts, removed {removed} unreferenced files.'
+        ))
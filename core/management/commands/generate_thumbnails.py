@@ -0,0 +1,21 @@
+# core/management/commands/generate_thumbnails.py
+from django.core.management.base import BaseCommand
+
+from core.models import Profile
+from core.thumbnails import process_profile_picture
+
+
+class Command(BaseCommand):
+    help = 'Generates missing profile picture renditions, e.g. for pictures uploaded before the pipeline existed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate renditions that already exist too.')
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+        done = 0
+        for profile_id, picture, source in profiles.values_list('pk', 'profile_picture', 'thumbnail_source').iterator():
+            if options['all'] or picture != source:
+                process_profile_picture(profile_id, picture)
+                done += 1
+        self.stdout.write(self.style.SUCCESS(f'Generated renditions for {done} profile pictures.'))
@@ -0,0 +1,47 @@
+# core/management/commands/perf_report.py
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import summarize
+
+
+class Command(BaseCommand):
+    help = 'Summarizes per-view latency and query percentiles from the profiling log.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=settings.PROFILING_LOG_FILE,
+                            help='JSON-lines file written by QueryProfilingMiddleware.')
+        parser.add_argument('--sort', default='wall_ms', choices=['wall_ms', 'db_ms', 'template_ms', 'queries'])
+
+    def handle(self, *args, **options):
+        if not options['file']:
+            raise CommandError('No log file: set PROFILING_LOG_FILE or pass --file.')
+
+        samples = defaultdict(list)
+        try:
+            with open(options['file']) as log:
+                for line in log:
+                    sample = json.loads(line)
+                    samples[sample.pop('view')].append(sample)
+        except FileNotFoundError:
+            raise CommandError(f"{options['file']} does not exist.")
+
+        metric = options['sort']
+        report = sorted(((view, summarize(rows)) for view, rows in samples.items()),
+                        key=lambda item: item[1][metric]['p95'], reverse=True)
+
+        self.stdout.write(f'{"view":<28}{"reqs":>7}{"wall p50/p95/p99 ms":>26}{"db p95":>10}'
+                          f'{"tpl p95":>10}{"queries p95":>13}{"n+1":>6}')
+        for view, summary in report:
+            wall = summary['wall_ms']
+            self.stdout.write(
+                f'{view:<28}{summary["requests"]:>7}'
+                f'{wall["p50"]:>10.1f}{wall["p95"]:>8.1f}{wall["p99"]:>8.1f}'
+                f'{summary["db_ms"]["p95"]:>10.1f}{summary["template_ms"]["p95"]:>10.1f}'
+                f'{summary["queries"]["p95"]:>13}{summary["n_plus_one"]:>6}'
+            )
+            for sql in summary['top_repeated']:
+                self.stdout.write(self.style.WARNING(f'    repeated: {sql[:110]}'))
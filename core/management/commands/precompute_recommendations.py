@@ -0,0 +1,16 @@
+# core/management/commands/precompute_recommendations.py
+from django.core.management.base import BaseCommand
+
+from core.recommendations import PRECOMPUTE_BATCH_SIZE, precompute
+
+
+class Command(BaseCommand):
+    help = ('Scores the open jobs for every freelancer and caches their "Recommended for you" lists, '
+            'so dashboards do not compute them on first view. Run after bulk job imports or from cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PRECOMPUTE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        done = precompute(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Cached recommendations for {done} freelancers.'))
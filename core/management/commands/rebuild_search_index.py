@@ -0,0 +1,18 @@
+# core/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from core.models import Profile, Job
+from core.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index from the jobs and profiles tables.'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        self.stdout.write(f'Rebuilding index with {type(backend).__name__}...')
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {Job.objects.filter(is_open=True).count()} open jobs and '
+            f'{Profile.objects.filter(role="freelancer", user__is_active=True).count()} freelancers.'
+        ))
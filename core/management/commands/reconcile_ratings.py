@@ -0,0 +1,15 @@
+# core/management/commands/reconcile_ratings.py
+from django.core.management.base import BaseCommand
+
+from core.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the denormalized rating aggregates on profiles from their reviews.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = reconcile_ratings(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Reconciled ratings: {fixed} profiles updated.'))
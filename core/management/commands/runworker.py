@@ -0,0 +1,47 @@
+# core/management/commands/runworker.py
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.taskqueue import LEASE_SECONDS, Worker, purge
+
+
+def work(options):
+    worker = Worker(threads=options['threads'], poll_interval=options['poll_interval'], lease=options['lease'])
+    # SIGTERM (systemd, docker stop) finishes the tasks in hand before exiting
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    try:
+        return worker.run(burst=options['burst'])
+    except KeyboardInterrupt:
+        worker.stop()
+        return worker.processed
+
+
+class Command(BaseCommand):
+    help = 'Runs queued tasks (core.taskqueue) in a pool of threads, optionally in several processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help='Tasks run at once per process.')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Worker processes, for CPU-bound tasks; each has its own thread pool.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls when idle.')
+        parser.add_argument('--lease', type=int, default=LEASE_SECONDS,
+                            help='Seconds after which a running task is presumed lost and retried.')
+        parser.add_argument('--burst', action='store_true', help='Exit once no task is due.')
+        parser.add_argument('--purge-days', type=int, default=7,
+                            help='Delete tasks that finished this many days ago on startup.')
+
+    def handle(self, *args, **options):
+        purged = purge(options['purge_days'])
+        if purged:
+            self.stdout.write(f'Purged {purged} finished tasks.')
+        if options['processes'] <= 1:
+            processed = work(options)
+        else:
+            # Forked children must not share the parent's database connections
+            connections.close_all()
+            with multiprocessing.get_context('fork').Pool(options['processes']) as pool:
+                processed = sum(pool.map(work, [options] * options['processes']))
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} tasks.'))
@@ -1,82 +1,231 @@
 # core/management/commands/seed.py
-from django.core.management.base import BaseCommand
-from django.contrib.auth.models import User
-from core.models import Profile, Job, Proposal
 import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.fragments import fragment_cache
+from core.models import Profile, Job, Proposal, Thread, Message, Review, Skill
+from core.ratings import reconcile_ratings
+from core.search import get_search_backend
+from core.skills import parse_skills
+
+JOB_TITLES = [
+    'Build a Custom Django Web App', 'Develop a Mobile-First Portfolio Site',
+    'Frontend Design with React', 'Backend API for E-commerce',
+    'Full-Stack Developer for SaaS Project', 'Data Analysis with Python',
+    'WordPress Plugin Development', 'Database Migration Specialist',
+    'Cloud Infrastructure Setup on AWS', 'UI/UX Design for a New App',
+    'Write a Technical Blog Post', 'Quality Assurance Testing',
+    'Machine Learning Model Training', 'Video Editing and Production',
+    'Content Writer for Website'
+]
+
+SKILLS = [
+    'Python', 'Django', 'React', 'JavaScript', 'TypeScript', 'PostgreSQL', 'AWS', 'Docker',
+    'Figma', 'UI Design', 'Copywriting', 'SEO', 'Machine Learning', 'Pandas', 'WordPress',
+    'PHP', 'Video Editing', 'QA Testing', 'Go', 'Kubernetes',
+]
+
+TITLES = ['Backend Developer', 'Frontend Developer', 'Designer', 'Data Scientist', 'Writer', 'DevOps Engineer']
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    # auto_now_add would stamp every bulk-created row with the same instant
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
 
 
 class Command(BaseCommand):
     help = 'Seeds the database with sample data.'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=10)
+        parser.add_argument('--freelancers', type=int, default=10)
+        parser.add_argument('--jobs', type=int, default=15)
+        parser.add_argument('--max-proposals', type=int, default=3, help='Upper bound of proposals per job.')
+        parser.add_argument('--hired-ratio', type=float, default=0.3,
+                            help='Share of jobs with an accepted proposal (and a message thread).')
+        parser.add_argument('--messages', type=int, default=10, help='Upper bound of messages per thread.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def flush(self, model, rows, force=False):
+        """Bulk-inserts `rows` once a chunk is full; returns the list to keep filling."""
+        if rows and (force or len(rows) >= self.chunk_size):
+            model.objects.bulk_create(rows, batch_size=self.chunk_size)
+            self.created[model.__name__] += len(rows)
+            return []
+        return rows
+
     def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.created = {name: 0 for name in ('User', 'Profile', 'Job', 'Proposal', 'Thread', 'Message', 'Review')}
+        now = timezone.now()
+
         self.stdout.write('Clearing old data...')
-        Profile.objects.all().delete()
-        Job.objects.all().delete()
+        Message.objects.all().delete()
+        Thread.objects.all().delete()
+        Review.objects.all().delete()
         Proposal.objects.all().delete()
+        Job.objects.all().delete()
+        Profile.objects.all().delete()
+        Skill.objects.all().delete()
         User.objects.filter(is_superuser=False).delete()
 
         self.stdout.write('Creating new data...')
+        # Hashing is deliberately slow; every seeded user shares one hash of 'password123'
+        password = make_password('password123')
+        Skill.objects.bulk_create(
+            [Skill(slug=slug, name=name) for slug, name in parse_skills(', '.join(SKILLS))],
+            ignore_conflicts=True,
+        )
+        skill_ids = dict(Skill.objects.values_list('slug', 'id'))
+
+        # --- Users and profiles ---
+        def create_users(prefix, count):
+            ids = []
+            users = []
+            for i in range(1, count + 1):
+                name = f'{prefix}{i}'
+                users.append(User(username=name, email=f'{name}@example.com', password=password,
+                                  date_joined=now - timedelta(days=rng.randint(0, 720))))
+                if len(users) >= self.chunk_size or i == count:
+                    created = User.objects.bulk_create(users)
+                    self.created['User'] += len(created)
+                    ids.extend(user.pk for user in created)
+                    users = []
+            return ids
+
+        client_ids = create_users('client', options['clients'])
+        freelancer_ids = create_users('freelancer', options['freelancers'])
+
+        profiles = []
+        for user_id in client_ids:
+            profiles.append(Profile(user_id=user_id, role='client', bio=f'A client account #{user_id}.',
+                                    company_name=f'Company {user_id}'))
+            profiles = self.flush(Profile, profiles)
+        profiles = self.flush(Profile, profiles, force=True)
+
+        for user_id in freelancer_ids:
+            names = rng.sample(SKILLS, rng.randint(2, 5))
+            profiles.append(Profile(user_id=user_id, role='freelancer', bio=f'A skilled freelancer #{user_id}.',
+                                    title=rng.choice(TITLES), skills=', '.join(names),
+                                    hourly_rate=rng.randint(20, 100)))
+            profiles = self.flush(Profile, profiles)
+        self.flush(Profile, profiles, force=True)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(client_ids)} clients and {len(freelancer_ids)} freelancers.'
+        ))
+
+        # Link freelancer profiles to their skills
+        profile_through = Profile.skill_tags.through
+        profile_skill_rows = []
+        for profile_id, text in Profile.objects.filter(user_id__in=freelancer_ids).values_list('pk', 'skills').iterator():
+            for slug, _ in parse_skills(text):
+                profile_skill_rows.append(profile_through(profile_id=profile_id, skill_id=skill_ids[slug]))
+            if len(profile_skill_rows) >= self.chunk_size:
+                profile_through.objects.bulk_create(profile_skill_rows)
+                profile_skill_rows = []
+        profile_through.objects.bulk_create(profile_skill_rows)
 
-        # --- Create 10 Clients ---
-        client_names = ['clientA', 'clientB', 'clientC', 'clientD', 'clientE', 'clientF', 'clientG', 'clientH',
-                        'clientI', 'clientJ']
-        clients = []
-        for name in client_names:
-            user = User.objects.create_user(username=name, email=f'{name}@example.com', password='password123')
-            profile = Profile.objects.create(user=user, role='client', bio=f'A new client named {name}.')
-            clients.append(user)
-        self.stdout.write(self.style.SUCCESS(f'Created {len(clients)} clients.'))
-
-        # --- Create 10 Freelancers ---
-        freelancer_names = ['freelancer1', 'freelancer2', 'freelancer3', 'freelancer4', 'freelancer5', 'freelancer6',
-                            'freelancer7', 'freelancer8', 'freelancer9', 'freelancer10']
-        freelancers = []
-        for name in freelancer_names:
-            user = User.objects.create_user(username=name, email=f'{name}@example.com', password='password123')
-            profile = Profile.objects.create(user=user, role='freelancer', bio=f'A skilled freelancer named {name}.',
-                                             hourly_rate=random.randint(20, 100))
-            freelancers.append(user)
-        self.stdout.write(self.style.SUCCESS(f'Created {len(freelancers)} freelancers.'))
-
-        # --- Create 15-20 Jobs ---
-        job_titles = [
-            'Build a Custom Django Web App', 'Develop a Mobile-First Portfolio Site',
-            'Frontend Design with React', 'Backend API for E-commerce',
-            'Full-Stack Developer for SaaS Project', 'Data Analysis with Python',
-            'WordPress Plugin Development', 'Database Migration Specialist',
-            'Cloud Infrastructure Setup on AWS', 'UI/UX Design for a New App',
-            'Write a Technical Blog Post', 'Quality Assurance Testing',
-            'Machine Learning Model Training', 'Video Editing and Production',
-            'Content Writer for Website'
-        ]
-
-        jobs = []
-        for i, title in enumerate(job_titles):
-            client = random.choice(clients)
-            job = Job.objects.create(
-                client=client,
+        if not client_ids:
+            self.stdout.write(self.style.SUCCESS('Database seeded successfully!'))
+            return
+
+        # --- Jobs, proposals, threads, messages and reviews ---
+        job_through = Job.skill_tags.through
+        with explicit_timestamps(Job._meta.get_field('created_at'), Proposal._meta.get_field('created_at'),
+                                 Message._meta.get_field('timestamp'), Review._meta.get_field('created_at')):
+            remaining = options['jobs']
+            while remaining > 0:
+                batch = min(remaining, self.chunk_size)
+                remaining -= batch
+                self.create_job_batch(rng, batch, now, client_ids, freelancer_ids, skill_ids, job_through, options)
+
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{count} {name.lower()}s' for name, count in self.created.items()) + ' created.'
+        ))
+
+        # bulk_create skips signals, so derived data is rebuilt in bulk
+        reconcile_ratings(batch_size=self.chunk_size)
+        get_search_backend().rebuild()
+        fragment_cache().clear()
+        self.stdout.write(self.style.SUCCESS('Database seeded successfully!'))
+
+    def create_job_batch(self, rng, count, now, client_ids, freelancer_ids, skill_ids, job_through, options):
+        # Plan each job first so its final state (open, hired, completed) is inserted in one pass
+        jobs, plans = [], []
+        for _ in range(count):
+            title = rng.choice(JOB_TITLES)
+            bid_count = min(rng.randint(1, options['max_proposals']), len(freelancer_ids)) if options['max_proposals'] else 0
+            bidders = rng.sample(freelancer_ids, bid_count)
+            winner = bidders[0] if bidders and rng.random() < options['hired_ratio'] else None
+            completed = winner is not None and rng.random() < 0.5
+            jobs.append(Job(
+                client_id=rng.choice(client_ids),
                 title=title,
-                description=f'Looking for a professional to help with {title.lower()}. The project requires attention to detail and a strong work ethic.',
-                budget=random.randint(500, 5000)
-            )
-            jobs.append(job)
-        self.stdout.write(self.style.SUCCESS(f'Created {len(jobs)} jobs.'))
-
-        # --- Create Proposals for each Job (1-3 proposals per job) ---
-        for job in jobs:
-            num_proposals = random.randint(1, 3)
-            # Shuffle freelancers to get unique proposals
-            random.shuffle(freelancers)
-
-            for i in range(num_proposals):
-                freelancer = freelancers[i]
-                if not Proposal.objects.filter(job=job, freelancer=freelancer).exists():
-                    Proposal.objects.create(
-                        job=job,
-                        freelancer=freelancer,
-                        cover_letter=f'As a {freelancer.profile.skills} expert, I am confident I can exceed expectations on this project.',
-                        rate=random.randint(int(job.budget * 0.8), int(job.budget * 1.2))
-                    )
-        self.stdout.write(self.style.SUCCESS('Created proposals.'))
-
-        self.stdout.write(self.style.SUCCESS('Database seeded successfully!'))
\ No newline at end of file
+                description=f'Looking for a professional to help with {title.lower()}. '
+                            f'The project requires attention to detail and a strong work ethic.',
+                budget=rng.randint(500, 5000),
+                skills_required=', '.join(rng.sample(SKILLS, rng.randint(1, 4))),
+                is_open=winner is None,
+                status='completed' if completed else 'active',
+                created_at=now - timedelta(minutes=rng.randint(0, 525600)),
+            ))
+            plans.append((bidders, winner, completed))
+        jobs = Job.objects.bulk_create(jobs)
+        self.created['Job'] += len(jobs)
+
+        job_skills, proposals, threads, reviews = [], [], [], []
+        for job, (bidders, winner, completed) in zip(jobs, plans):
+            for slug, _ in parse_skills(job.skills_required):
+                job_skills.append(job_through(job_id=job.pk, skill_id=skill_ids[slug]))
+            for freelancer_id in bidders:
+                status = 'pending' if winner is None else ('accepted' if freelancer_id == winner else 'rejected')
+                proposals.append(Proposal(
+                    job_id=job.pk, freelancer_id=freelancer_id, status=status,
+                    cover_letter='I am confident I can exceed expectations on this project.',
+                    rate=rng.randint(job.budget * 8 // 10, job.budget * 12 // 10),
+                    created_at=job.created_at + timedelta(minutes=rng.randint(1, 4320)),
+                ))
+            if winner is not None:
+                threads.append(Thread(job_id=job.pk, client_id=job.client_id, freelancer_id=winner))
+            if completed:
+                reviews.append(Review(
+                    job_id=job.pk, client_id=job.client_id, freelancer_id=winner,
+                    rating=rng.randint(1, 5), comment='Great work.',
+                    created_at=job.created_at + timedelta(days=rng.randint(7, 60)),
+                ))
+
+        job_through.objects.bulk_create(job_skills, batch_size=self.chunk_size)
+        self.flush(Proposal, proposals, force=True)
+        self.flush(Review, reviews, force=True)
+
+        threads = Thread.objects.bulk_create(threads, batch_size=self.chunk_size)
+        self.created['Thread'] += len(threads)
+        created_at = {job.pk: job.created_at for job in jobs}
+        messages = []
+        for thread in threads:
+            sent = created_at[thread.job_id] + timedelta(days=1)
+            for _ in range(rng.randint(0, options['messages'])):
+                sent += timedelta(minutes=rng.randint(1, 600))
+                messages.append(Message(
+                    thread_id=thread.pk,
+                    sender_id=rng.choice((thread.client_id, thread.freelancer_id)),
+                    body=rng.choice(['Sounds good.', 'Any update?', 'Sent the files.', 'Thanks!', 'On it.']),
+                    timestamp=sent,
+                ))
+            messages = self.flush(Message, messages)
+        self.flush(Message, messages, force=True)
@@ -0,0 +1,172 @@
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+from .models import Message, Proposal
+from .storage import BLOB_PREFIX
+
+# Uploads only the people involved may download; everything else under
+# MEDIA_ROOT (profile pictures and their renditions) is public
+PROTECTED_PREFIXES = (BLOB_PREFIX + '/', 'message_files/', 'proposals/')
+# Protected files of any other type are sent as downloads, never rendered inline
+INLINE_CONTENT_TYPES = {'image/png', 'image/jpeg', 'image/gif', 'image/webp', 'application/pdf', 'text/plain'}
+PUBLIC_MAX_AGE = 60 * 60 * 24
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def is_protected(name):
+    return name.startswith(PROTECTED_PREFIXES)
+
+
+def accessible_upload_name(user, name):
+    """
+    Checks that `user` may download the protected upload `name`: they take part
+    in a thread that carries it, or sent or received a proposal with it. As
+    blobs are shared, any one referencing row is enough. Returns the uploaded
+    filename to offer, '' if there is none, or None when access is denied.
+    """
+    if not user.is_authenticated:
+        return None
+    if user.is_staff:
+        return ''
+    message = Message.objects.filter(
+        Q(thread__client=user) | Q(thread__freelancer=user), file=name,
+    ).values_list('file_name', flat=True).first()
+    if message is not None:
+        return message
+    return Proposal.objects.filter(
+        Q(freelancer=user) | Q(job__client=user), attachment=name,
+    ).values_list('attachment_name', flat=True).first()
+
+
+def file_etag(name, stat):
+    # Content-addressed names already are a strong validator
+    if name.startswith(BLOB_PREFIX + '/'):
+        return '"%s"' % posixpath.splitext(posixpath.basename(name))[0]
+    return '"%x-%x"' % (stat.st_size, stat.st_mtime_ns)
+
+
+def parse_range(header, size):
+    """
+    Returns the (start, end) byte positions, end inclusive, of a single-range
+    `Range` header; None to serve the whole file (no header, or a form we do not
+    handle such as multiple ranges); or False when the range cannot be met.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def if_range_passes(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        # Weak validators never match If-Range
+        return if_range == etag
+    date = parse_http_date_safe(if_range)
+    return date is not None and date >= int(last_modified)
+
+
+class FileRange:
+    """Read-only view of bytes start..end of a file, for FileResponse."""
+
+    def __init__(self, file, start, end):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = end - start + 1
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def serve_file(request, storage, name, filename='', protected=False):
+    """
+    Serves `name` from `storage` (a FileSystemStorage) with conditional GET,
+    single byte ranges and, depending on settings.MEDIA_SERVE_MODE, either
+    FileResponse (which lets the WSGI server use sendfile) or a hand-off header
+    to the fronting proxy.
+    """
+    path = storage.path(name)
+    stat = os.stat(path)
+    etag = file_etag(name, stat)
+    last_modified = stat.st_mtime
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+    def with_headers(response):
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(last_modified)
+        response.headers['Accept-Ranges'] = 'bytes'
+        max_age = IMMUTABLE_MAX_AGE if name.startswith(BLOB_PREFIX + '/') else PUBLIC_MAX_AGE
+        if protected:
+            patch_cache_control(response, private=True, max_age=max_age)
+        else:
+            patch_cache_control(response, public=True, max_age=max_age)
+        if protected and content_type not in INLINE_CONTENT_TYPES:
+            response.headers['Content-Disposition'] = content_disposition_header(True, filename or posixpath.basename(name))
+        elif filename:
+            response.headers['Content-Disposition'] = content_disposition_header(False, filename)
+        return response
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+    if not_modified is not None:
+        return with_headers(not_modified) if not_modified.status_code == 304 else not_modified
+
+    mode = settings.MEDIA_SERVE_MODE
+    if mode in ('x-accel', 'x-sendfile'):
+        # The proxy reads the file and answers Range requests itself
+        response = HttpResponse(content_type=content_type)
+        if mode == 'x-accel':
+            response.headers['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + name
+        else:
+            response.headers['X-Sendfile'] = path
+        return with_headers(response)
+
+    byte_range = None
+    if request.method == 'GET' and 'Range' in request.headers and if_range_passes(request, etag, last_modified):
+        byte_range = parse_range(request.headers['Range'], stat.st_size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response.headers['Content-Range'] = f'bytes */{stat.st_size}'
+        return with_headers(response)
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        return with_headers(FileResponse(file, content_type=content_type))
+    start, end = byte_range
+    response = FileResponse(FileRange(file, start, end), status=206, content_type=content_type)
+    response.headers['Content-Length'] = end - start + 1
+    response.headers['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    return with_headers(response)
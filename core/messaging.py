@@ -0,0 +1,122 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.template.loader import render_to_string
+
+from .models import Message
+from .pagination import KeysetPaginator
+from .realtime import get_broker
+from .thumbnails import rendition_url
+
+MESSAGE_WINDOW = 50
+MAX_MESSAGES_SINCE = 200
+
+
+def thread_messages(thread):
+    # sender__profile is needed by every message bubble (name + avatar)
+    return Message.objects.filter(thread=thread).select_related('sender__profile')
+
+
+def message_window(thread, before=None, size=MESSAGE_WINDOW):
+    """
+    Returns one window of a thread's messages, newest first, and the cursor for
+    the next older window. Backed by the (thread, timestamp) index.
+    """
+    paginator = KeysetPaginator(thread_messages(thread), size, ordering=('-timestamp', '-id'))
+    return paginator.page(before)
+
+
+def messages_since(thread, after_id, limit=MAX_MESSAGES_SINCE):
+    """Messages newer than `after_id`, oldest first, for delta polling."""
+    return list(thread_messages(thread).filter(id__gt=after_id).order_by('id')[:limit])
+
+
+def avatar_url(user):
+    try:
+        profile = user.profile
+    except ObjectDoesNotExist:
+        return None
+    return rendition_url(profile, 40)
+
+
+def serialize_message(message):
+    return {
+        'id': message.pk,
+        'sender': message.sender.username,
+        'sender_avatar': avatar_url(message.sender),
+        'body': message.body,
+        'file': message.file.url if message.file else None,
+        'file_name': message.file_name or None,
+        'timestamp': message.timestamp.isoformat(),
+    }
+
+
+# --- Real-time delivery ---
+
+def thread_channel(thread_id):
+    return f'thread:{thread_id}'
+
+
+def message_event(message):
+    """
+    The payload pushed to every participant. The bubble is rendered once per
+    send in both variants (own message / other side's message) so subscribers
+    only pick one instead of each rendering it.
+    """
+    def render(user):
+        return render_to_string('core/thread_messages.html', {'messages': [message], 'user': user})
+
+    return {
+        'message': serialize_message(message),
+        'html': {'mine': render(message.sender), 'theirs': render(None)},
+    }
+
+
+def publish_message(message):
+    broker = get_broker()
+    channel = thread_channel(message.thread_id)
+    # Most messages are sent with nobody watching the thread live; skip the rendering then
+    if broker.has_subscribers(channel):
+        broker.publish(channel, message_event(message))
+
+
+def format_sse(payload, event='message'):
+    data = json.dumps(payload, separators=(',', ':'))
+    return f"id: {payload['message']['id']}\nevent: {event}\ndata: {data}\n\n"
+
+
+async def thread_event_stream(thread, after_id=None):
+    """
+    Server-sent event stream of new messages in `thread`.
+
+    When the client reconnects with a Last-Event-ID (`after_id`), messages it
+    missed are replayed from the database first. The subscription is opened
+    before that read so nothing published in between is lost; duplicates are
+    dropped by id.
+    """
+    subscription = get_broker().subscribe(thread_channel(thread.pk))
+    try:
+        yield 'retry: 3000\n\n'
+        last_id = after_id or 0
+        if after_id is not None:
+            backlog = await sync_to_async(
+                lambda: [message_event(m) for m in messages_since(thread, after_id)]
+            )()
+            for payload in backlog:
+                last_id = payload['message']['id']
+                yield format_sse(payload)
+
+        while True:
+            payload = await subscription.get(timeout=settings.REALTIME_KEEPALIVE)
+            if payload is None:
+                # Comment line; keeps proxies from timing out an idle stream
+                yield ': keepalive\n\n'
+                continue
+            if payload['message']['id'] <= last_id:
+                continue
+            last_id = payload['message']['id']
+            yield format_sse(payload)
+    finally:
+        subscription.close()
@@ -0,0 +1,96 @@
+import logging
+import random
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .profiling import RequestProfile, install_template_timer, store
+from .ratelimit import check, parse_rate, too_many_requests
+from .roles import get_role
+
+logger = logging.getLogger(__name__)
+
+
+class QueryProfilingMiddleware:
+    """
+    Samples requests and records SQL query count, DB time, template render time
+    and wall time per URL name, flagging statements repeated often enough to be
+    N+1 patterns. Unsampled requests pay one random() call.
+
+    Enabled by PROFILING_ENABLED; place it first in MIDDLEWARE so wall time
+    covers the whole stack.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.threshold = settings.PROFILING_N_PLUS_ONE_THRESHOLD
+        store.max_samples = settings.PROFILING_MAX_SAMPLES
+        store.log_file = settings.PROFILING_LOG_FILE
+        install_template_timer()
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        with profile.capture():
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        view_name = (match.view_name if match else None) or 'unresolved'
+        sample = profile.as_sample(self.threshold)
+        store.add(view_name, sample)
+        if sample['repeated']:
+            logger.warning(
+                'Possible N+1 in %s: %s',
+                view_name,
+                '; '.join(f'{count}x {sql[:120]}' for sql, count in sample['repeated'].items())
+            )
+        response['Server-Timing'] = (
+            f"db;dur={sample['db_ms']}, tpl;dur={sample['template_ms']}, total;dur={sample['wall_ms']}"
+        )
+        return response
+
+
+class ProfileRoleMiddleware:
+    """
+    Sets `request.role` from the session cache, loading the profile at most
+    once per request when the cache is cold. Goes after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.role = get_role(request)
+        return self.get_response(request)
+
+
+class RateLimitMiddleware:
+    """
+    Applies RATE_LIMITS to the views they name: {url_name: {'rate': '10/m',
+    'burst': 10, 'methods': ['POST']}}, where burst and methods are optional.
+    Requests to other views cost one dict lookup. Goes after
+    AuthenticationMiddleware so logged-in users are limited per account.
+    """
+
+    def __init__(self, get_response):
+        if not settings.RATE_LIMIT_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        url_name = request.resolver_match.url_name
+        rule = settings.RATE_LIMITS.get(url_name)
+        if rule is None or ('methods' in rule and request.method not in rule['methods']):
+            return None
+        retry_after = check(request, url_name, parse_rate(rule['rate'], rule.get('burst')))
+        if retry_after:
+            return too_many_requests(retry_after)
+        return None
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_job_status_message_file_proposal_attachment_review'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_open', 'created_at'], name='core_job_open_created_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+def create_fts_tables(apps, schema_editor):
+    # FTS5 is SQLite-only; other databases fall back to DatabaseSearchBackend
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    tokenize = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS core_job_fts USING fts5(title, description, skills_required, {tokenize})'
+    )
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS core_profile_fts USING fts5(username, title, skills, bio, {tokenize})'
+    )
+    schema_editor.execute(
+        "INSERT INTO core_job_fts (rowid, title, description, skills_required) "
+        "SELECT id, title, description, COALESCE(skills_required, '') FROM core_job WHERE is_open"
+    )
+    schema_editor.execute(
+        "INSERT INTO core_profile_fts (rowid, username, title, skills, bio) "
+        "SELECT p.id, u.username, COALESCE(p.title, ''), COALESCE(p.skills, ''), COALESCE(p.bio, '') "
+        "FROM core_profile p JOIN auth_user u ON u.id = p.user_id "
+        "WHERE p.role = 'freelancer' AND u.is_active"
+    )
+
+
+def drop_fts_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS core_job_fts')
+    schema_editor.execute('DROP TABLE IF EXISTS core_profile_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_job_open_created_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_tables, drop_fts_tables),
+    ]
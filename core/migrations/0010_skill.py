@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_search_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('slug', models.SlugField(unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='skill_tags',
+            field=models.ManyToManyField(blank=True, related_name='jobs', to='core.skill'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='skill_tags',
+            field=models.ManyToManyField(blank=True, related_name='profiles', to='core.skill'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+import re
+
+from django.db import migrations
+from django.utils.text import slugify
+
+SEPARATOR_RE = re.compile(r'[,;\n]+')
+SYMBOLS = [(re.compile(r'\+'), ' plus '), (re.compile(r'#'), ' sharp '), (re.compile(r'^\.'), 'dot ')]
+
+
+def skill_slug(name):
+    # Frozen copy of core.skills.skill_slug
+    for pattern, word in SYMBOLS:
+        name = pattern.sub(word, name)
+    return slugify(name)[:50]
+
+
+def parse_skills(text):
+    # Frozen copy of core.skills.parse_skills
+    parsed = {}
+    for part in SEPARATOR_RE.split(text or ''):
+        name = ' '.join(part.split())[:50]
+        slug = skill_slug(name)
+        if slug and slug not in parsed:
+            parsed[slug] = name
+    return list(parsed.items())
+
+
+def populate_skill_tags(apps, schema_editor):
+    Skill = apps.get_model('core', 'Skill')
+    Profile = apps.get_model('core', 'Profile')
+    Job = apps.get_model('core', 'Job')
+
+    sources = [
+        (Profile, Profile.skill_tags.through, 'profile_id', 'skills'),
+        (Job, Job.skill_tags.through, 'job_id', 'skills_required'),
+    ]
+
+    # First pass: collect every distinct skill and create them in one go
+    names = {}
+    for model, _, _, field in sources:
+        for text in model.objects.exclude(**{f'{field}__isnull': True}).values_list(field, flat=True).iterator():
+            for slug, name in parse_skills(text):
+                names.setdefault(slug, name)
+    Skill.objects.bulk_create([Skill(slug=slug, name=name) for slug, name in names.items()], batch_size=500)
+    skill_ids = dict(Skill.objects.values_list('slug', 'id'))
+
+    # Second pass: link rows to their skills
+    for model, through, owner_column, field in sources:
+        links = []
+        for pk, text in model.objects.values_list('pk', field).iterator():
+            for slug, _ in parse_skills(text):
+                links.append(through(**{owner_column: pk, 'skill_id': skill_ids[slug]}))
+        through.objects.bulk_create(links, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_skill'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_skill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:52
+
+from django.conf import settings
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_ratings(apps, schema_editor):
+    Profile = apps.get_model('core', 'Profile')
+    Review = apps.get_model('core', 'Review')
+    totals = Review.objects.order_by().values('freelancer').annotate(count=Count('pk'), total=Sum('rating'))
+    batch = []
+    for row in totals.iterator():
+        batch.append(Profile(
+            user_id=row['freelancer'],
+            rating_count=row['count'],
+            rating_sum=row['total'],
+            rating_avg=(Decimal(row['total']) / row['count']).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+        ))
+    profile_ids = dict(Profile.objects.filter(user_id__in=[p.user_id for p in batch]).values_list('user_id', 'pk'))
+    for profile in batch:
+        profile.pk = profile_ids.get(profile.user_id)
+    Profile.objects.bulk_update([p for p in batch if p.pk], ['rating_count', 'rating_sum', 'rating_avg'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_populate_skill_tags'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='rating_avg',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['role', 'rating_avg'], name='core_profile_rating_idx'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_attachment_blobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['client', 'created_at'], name='core_job_client_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(fields=['freelancer', 'created_at'], name='core_proposal_fl_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(fields=['job', 'status'], name='core_proposal_job_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['freelancer', 'created_at'], name='core_review_fl_created_idx'),
+        ),
+    ]
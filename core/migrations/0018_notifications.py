@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_task_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='unread_notifications',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('proposal', 'New proposal'), ('accepted', 'Proposal accepted'), ('rejected', 'Proposal rejected'), ('message', 'New message')], max_length=20)),
+                ('text', models.CharField(max_length=255)),
+                ('url', models.CharField(blank=True, max_length=255)),
+                ('group', models.CharField(blank=True, default='', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('emailed_at', models.DateTimeField(blank=True, null=True)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['recipient', 'created_at'], name='core_notif_recipient_idx'), models.Index(fields=['emailed_at', 'created_at'], name='core_notif_emailed_idx')],
+            },
+        ),
+    ]
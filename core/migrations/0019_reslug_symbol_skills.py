@@ -0,0 +1,81 @@
+import re
+
+from django.db import migrations
+from django.db.models import Q
+from django.utils.text import slugify
+
+SEPARATOR_RE = re.compile(r'[,;\n]+')
+SYMBOLS = [(re.compile(r'\+'), ' plus '), (re.compile(r'#'), ' sharp '), (re.compile(r'^\.'), 'dot ')]
+
+
+def skill_slug(name):
+    # Frozen copy of core.skills.skill_slug
+    for pattern, word in SYMBOLS:
+        name = pattern.sub(word, name)
+    return slugify(name)[:50]
+
+
+def parse_skills(text):
+    # Frozen copy of core.skills.parse_skills
+    parsed = {}
+    for part in SEPARATOR_RE.split(text or ''):
+        name = ' '.join(part.split())[:50]
+        slug = skill_slug(name)
+        if slug and slug not in parsed:
+            parsed[slug] = name
+    return list(parsed.items())
+
+
+def reslug_symbol_skills(apps, schema_editor):
+    """
+    Skills were slugged with their symbols dropped, so C++ and C# were filed
+    under C. Re-tags the rows whose skills mention a symbol and renames or
+    removes the skills that were merged into the wrong slug.
+    """
+    Skill = apps.get_model('core', 'Skill')
+    Profile = apps.get_model('core', 'Profile')
+    Job = apps.get_model('core', 'Job')
+    sources = [
+        (Profile, Profile.skill_tags.through, 'profile_id', 'skills'),
+        (Job, Job.skill_tags.through, 'job_id', 'skills_required'),
+    ]
+
+    parsed = []
+    names = {}
+    for model, through, owner_column, field in sources:
+        mentions_symbol = Q(**{f'{field}__contains': '+'}) | Q(**{f'{field}__contains': '#'}) | Q(
+            **{f'{field}__contains': '.'})
+        for pk, text in model.objects.filter(mentions_symbol).values_list('pk', field).iterator():
+            pairs = parse_skills(text)
+            parsed.append((through, owner_column, pk, pairs))
+            for slug, name in pairs:
+                names.setdefault(slug, name)
+    Skill.objects.bulk_create([Skill(slug=slug, name=name) for slug, name in names.items()],
+                              batch_size=500, ignore_conflicts=True)
+    skill_ids = dict(Skill.objects.values_list('slug', 'id'))
+
+    for through, owner_column, pk, pairs in parsed:
+        through.objects.filter(**{owner_column: pk}).delete()
+        through.objects.bulk_create([through(**{owner_column: pk, 'skill_id': skill_ids[slug]}) for slug, _ in pairs])
+
+    for skill in Skill.objects.all().iterator():
+        if skill_slug(skill.name) == skill.slug:
+            continue
+        if not skill.jobs.exists() and not skill.profiles.exists():
+            skill.delete()
+        else:
+            # Still used under its old slug (e.g. 'c' named 'C++' by the first
+            # row that mentioned it), so the display name follows the slug
+            skill.name = skill.slug.replace('-', ' ').title()
+            skill.save(update_fields=['name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_notifications'),
+    ]
+
+    operations = [
+        migrations.RunPython(reslug_symbol_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def unpublish_renditions(apps, schema_editor):
+    # Rendition names now hash the whole source name, so the files made under
+    # the old names are no longer found; originals are served until
+    # `manage.py generate_thumbnails` has made them again
+    Profile = apps.get_model('core', 'Profile')
+    Profile.objects.exclude(thumbnail_source='').update(thumbnail_source='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_reslug_symbol_skills'),
+    ]
+
+    operations = [
+        migrations.RunPython(unpublish_renditions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_rename_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
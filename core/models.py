@@ -3,7 +3,18 @@ from django.contrib.auth.models import User
 from django.core.validators import FileExtensionValidator
 from django.db import models
 from django.core.validators import MaxValueValidator, MinValueValidator
+from django.utils import timezone
 
+from .storage import get_attachment_storage
+
+
+
+class Skill(models.Model):
+    name = models.CharField(max_length=50)
+    slug = models.SlugField(max_length=50, unique=True)
+
+    def __str__(self):
+        return self.name
 
 
 class Profile(models.Model):
@@ -17,12 +28,29 @@ class Profile(models.Model):
     bio = models.TextField(blank=True, null=True)
     hourly_rate = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
     skills = models.CharField(max_length=255, null=True, blank=True)
+    # Normalized form of `skills`, kept in sync by core.signals
+    skill_tags = models.ManyToManyField(Skill, blank=True, related_name='profiles')
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
+    # The picture whose resized renditions are ready (core.thumbnails)
+    thumbnail_source = models.CharField(max_length=255, blank=True, default='')
     location = models.CharField(max_length=100, blank=True, null=True)
     title = models.CharField(max_length=100, blank=True, null=True)
     # New field for clients
     company_name = models.CharField(max_length=100, blank=True, null=True)
 
+    # Denormalized review aggregates, maintained by core.ratings
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_avg = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    # Denormalized count of unread notifications, maintained by core.notifications
+    unread_notifications = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Lets talent search filter and sort freelancers by rating
+            models.Index(fields=['role', 'rating_avg'], name='core_profile_rating_idx'),
+        ]
+
 def __str__(self):
         return f'{self.user.username} Profile'
 
@@ -33,6 +61,8 @@ class Job(models.Model):
     description = models.TextField()
     budget = models.DecimalField(max_digits=10, decimal_places=2)
     skills_required = models.CharField(max_length=255, blank=True)
+    # Normalized form of `skills_required`, kept in sync by core.signals
+    skill_tags = models.ManyToManyField(Skill, blank=True, related_name='jobs')
     is_open = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -44,6 +74,14 @@ class Job(models.Model):
     ]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
 
+    class Meta:
+        indexes = [
+            # Serves the open-jobs feed, which is keyset-paginated on (created_at, id)
+            models.Index(fields=['is_open', 'created_at'], name='core_job_open_created_idx'),
+            # The client dashboard and profile pages list a client's jobs newest first
+            models.Index(fields=['client', 'created_at'], name='core_job_client_created_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -58,6 +96,12 @@ class Review(models.Model):
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Paginated reviews on a freelancer's profile
+            models.Index(fields=['freelancer', 'created_at'], name='core_review_fl_created_idx'),
+        ]
+
     def __str__(self):
         return f'Review for {self.freelancer.username} by {self.client.username}'
 
@@ -79,11 +123,20 @@ class Proposal(models.Model):
     # Add the file field here
     attachment = models.FileField(
         upload_to='proposals/',
+        storage=get_attachment_storage,
         validators=[FileExtensionValidator(allowed_extensions=['pdf', 'doc', 'docx', 'txt', 'jpg', 'png'])]
     )
+    # The uploaded file's own name; the stored one is its content hash
+    attachment_name = models.CharField(max_length=255, blank=True, default='')
 
     class Meta:
         unique_together = ('job', 'freelancer')
+        indexes = [
+            # The freelancer dashboard, keyset-paginated on (created_at, id)
+            models.Index(fields=['freelancer', 'created_at'], name='core_proposal_fl_created_idx'),
+            # Status counts per job and the pending -> rejected sweep on hiring
+            models.Index(fields=['job', 'status'], name='core_proposal_job_status_idx'),
+        ]
 
     def __str__(self):
         return f'Proposal for {self.job.title} by {self.freelancer.username}'
@@ -105,8 +158,95 @@ class Message(models.Model):
     thread = models.ForeignKey(Thread, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     body = models.TextField()
-    file = models.FileField(upload_to='message_files/', null=True, blank=True)
+    file = models.FileField(upload_to='message_files/', storage=get_attachment_storage, null=True, blank=True)
+    file_name = models.CharField(max_length=255, blank=True, default='')
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Serves the latest-N window and the "load older" cursor in thread_detail
+            models.Index(fields=['thread', 'timestamp'], name='core_message_thread_ts_idx'),
+        ]
+
     def __str__(self):
         return f'{self.sender.username}: {self.body[:20]}'
+
+
+class Blob(models.Model):
+    """A content-addressed file shared by every attachment with the same bytes."""
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set by every reference change (which uses update(), so not auto_now);
+    # collect_blobs leaves recently changed blobs alone
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.name
+
+
+class Task(models.Model):
+    """A unit of deferred work for `manage.py runworker`; see core.taskqueue."""
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    name = models.CharField(max_length=255)
+    kwargs = models.JSONField(default=dict)
+    # Enqueueing a key that already exists is a no-op, whatever the status
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField()
+    # Set while a worker holds the task; an expired lease means the worker died
+    locked_by = models.CharField(max_length=64, blank=True, default='')
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers poll for due tasks in run_at order
+            models.Index(fields=['status', 'run_at'], name='core_task_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
+
+
+class Notification(models.Model):
+    """An in-app notification, also sent by email in the recipient's next digest."""
+    KIND_CHOICES = (
+        ('proposal', 'New proposal'),
+        ('accepted', 'Proposal accepted'),
+        ('rejected', 'Proposal rejected'),
+        ('message', 'New message'),
+    )
+
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    text = models.CharField(max_length=255)
+    url = models.CharField(max_length=255, blank=True)
+    # Events with the same group (e.g. one thread) are merged while unread
+    group = models.CharField(max_length=64, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+    emailed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The notifications page, newest first
+            models.Index(fields=['recipient', 'created_at'], name='core_notif_recipient_idx'),
+            # The digest dispatcher picks up what has not been emailed yet
+            models.Index(fields=['emailed_at', 'created_at'], name='core_notif_emailed_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} for {self.recipient.username}'
@@ -0,0 +1,167 @@
+"""
+In-app notifications and the email digests that batch them.
+
+notify() stores one row per recipient and bumps their Profile.unread_notifications
+counter; the navbar badge reads that counter through the fragment cache, so
+no page pays for a COUNT. Emails are never sent inline: the first event of
+every NOTIFICATION_DIGEST_INTERVAL window queues a send_digests task for the
+end of the window, which mails each recipient one digest of everything they
+have not read or been emailed yet.
+"""
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .fragments import fragment_cache
+from .models import Notification, Profile
+from .taskqueue import enqueue, task
+
+# Recipients whose digests are built and sent together
+DIGEST_BATCH_SIZE = 100
+# A count read just before a concurrent change can be cached after that
+# change cleared the key; it is wrong for at most this many seconds
+UNREAD_COUNT_TIMEOUT = 60
+
+
+def unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def forget_unread(user_ids):
+    # Deleted now and after commit, for the same reason fragments.invalidate bumps twice
+    keys = [unread_key(user_id) for user_id in user_ids]
+    fragment_cache().delete_many(keys)
+    transaction.on_commit(lambda: fragment_cache().delete_many(keys))
+
+
+def unread_count(user):
+    """The user's unread notification count: a cache read, or one primary-key lookup."""
+    cache = fragment_cache()
+    count = cache.get(unread_key(user.pk))
+    if count is None:
+        count = Profile.objects.filter(user_id=user.pk).values_list('unread_notifications', flat=True).first() or 0
+        # add(): a count cached meanwhile by another request is at least as fresh
+        cache.add(unread_key(user.pk), count, timeout=UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def notify(recipient_ids, kind, text, url='', group=''):
+    """
+    Notifies every user in `recipient_ids`. With a `group`, recipients that
+    still have an unread notification of that group are skipped, so a busy
+    thread makes one notification per reader rather than one per message.
+    """
+    recipient_ids = set(recipient_ids)
+    if group and recipient_ids:
+        recipient_ids -= set(Notification.objects.filter(
+            recipient_id__in=recipient_ids, group=group, read_at__isnull=True,
+        ).values_list('recipient_id', flat=True))
+    if not recipient_ids:
+        return []
+    notifications = Notification.objects.bulk_create([
+        Notification(recipient_id=user_id, kind=kind, text=text[:255], url=url, group=group)
+        for user_id in recipient_ids
+    ])
+    Profile.objects.filter(user_id__in=recipient_ids).update(unread_notifications=F('unread_notifications') + 1)
+    forget_unread(recipient_ids)
+    schedule_digest()
+    return notifications
+
+
+def mark_read(user, **filters):
+    """Marks the user's unread notifications (matching `filters`) read; returns how many."""
+    updated = Notification.objects.filter(recipient=user, read_at__isnull=True, **filters).update(
+        read_at=timezone.now(),
+    )
+    if updated:
+        Profile.objects.filter(user_id=user.pk).update(
+            unread_notifications=Greatest(F('unread_notifications') - updated, Value(0)),
+        )
+        forget_unread([user.pk])
+    return updated
+
+
+# --- Events ---
+
+def proposal_submitted(proposal):
+    job = proposal.job
+    notify([job.client_id], 'proposal', f'{proposal.freelancer.username} sent a proposal for "{job.title}".',
+           url=reverse('job_detail', args=[job.pk]))
+
+
+def proposal_accepted(acceptance):
+    proposal = acceptance.proposal
+    job = proposal.job
+    url = reverse('job_detail', args=[job.pk])
+    notify([proposal.freelancer_id], 'accepted', f'Your proposal for "{job.title}" was accepted.',
+           url=reverse('thread_detail', args=[acceptance.thread.pk]))
+    if acceptance.rejected:
+        rejected = job.proposals.filter(status='rejected').values_list('freelancer_id', flat=True)
+        notify(rejected, 'rejected', f'"{job.title}" was filled by another freelancer.', url=url)
+
+
+def message_posted(message):
+    thread = message.thread
+    recipient_id = thread.freelancer_id if message.sender_id == thread.client_id else thread.client_id
+    notify([recipient_id], 'message', f'New messages from {message.sender.username} about "{thread.job.title}".',
+           url=reverse('thread_detail', args=[thread.pk]), group=f'thread:{thread.pk}')
+
+
+# --- Digests ---
+
+def schedule_digest():
+    """Queues one send_digests task per interval, at the end of the interval."""
+    interval = settings.NOTIFICATION_DIGEST_INTERVAL
+    now = time.time()
+    window = int(now // interval)
+    # The cache spares the INSERT the idempotency key would reject anyway
+    if fragment_cache().add(f'notifications:digest:{window}', True, timeout=interval * 2):
+        enqueue(send_digests, key=f'notification-digest:{window}', delay=(window + 1) * interval - now)
+
+
+@task(max_attempts=5)
+def send_digests(batch_size=DIGEST_BATCH_SIZE):
+    """
+    Emails every recipient with pending notifications one digest over a single
+    connection per batch. Notifications already read in the app are not
+    mailed; either way they are marked so the next run skips them.
+    """
+    sent = 0
+    while True:
+        # Batched by recipient, so nobody's digest is split across batches
+        recipient_ids = list(
+            Notification.objects.filter(emailed_at__isnull=True).order_by('recipient_id')
+            .values_list('recipient_id', flat=True).distinct()[:batch_size]
+        )
+        if not recipient_ids:
+            return sent
+        pending = list(
+            Notification.objects.filter(emailed_at__isnull=True, recipient_id__in=recipient_ids)
+            .select_related('recipient').order_by('recipient_id', 'created_at')
+        )
+        by_recipient = defaultdict(list)
+        for notification in pending:
+            if notification.read_at is None and notification.recipient.email:
+                by_recipient[notification.recipient].append(notification)
+        messages = [digest_message(user, notifications) for user, notifications in by_recipient.items()]
+        if messages:
+            get_connection().send_messages(messages)
+        # Marked after sending: a crash in between re-sends rather than loses a digest
+        Notification.objects.filter(pk__in=[n.pk for n in pending]).update(emailed_at=timezone.now())
+        sent += len(messages)
+
+
+def digest_message(user, notifications):
+    context = {'user': user, 'notifications': notifications, 'site_url': settings.SITE_URL}
+    subject = (f'You have {len(notifications)} new notifications on TalentLink' if len(notifications) > 1
+               else notifications[0].text)
+    return EmailMessage(subject, render_to_string('core/email/notification_digest.txt', context),
+                        to=[user.email])
@@ -0,0 +1,150 @@
+import contextvars
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+
+# The profile of the request being handled on this thread/task, if it is sampled
+_current_profile = contextvars.ContextVar('request_profile', default=None)
+
+
+def normalize_sql(sql):
+    # The backend already hands us parameterized SQL; only IN lists vary in shape
+    return IN_LIST_RE.sub('IN (...)', sql)
+
+
+class RequestProfile:
+    """Query count, DB time and template time collected while one request runs."""
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.wall_time = 0.0
+        self.statements = Counter()
+        self._template_depth = 0
+
+    def _execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.query_count += 1
+            self.statements[normalize_sql(sql)] += 1
+
+    @contextmanager
+    def capture(self):
+        token = _current_profile.set(self)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self._execute))
+                yield self
+        finally:
+            self.wall_time = time.perf_counter() - start
+            _current_profile.reset(token)
+
+    def repeated_queries(self, threshold):
+        """Statements run at least `threshold` times: the usual N+1 signature."""
+        return {sql: count for sql, count in self.statements.items() if count >= threshold}
+
+    def as_sample(self, threshold):
+        return {
+            'queries': self.query_count,
+            'db_ms': round(self.db_time * 1000, 3),
+            'template_ms': round(self.template_time * 1000, 3),
+            'wall_ms': round(self.wall_time * 1000, 3),
+            'repeated': self.repeated_queries(threshold),
+        }
+
+
+_template_timer_installed = False
+
+
+def install_template_timer():
+    """
+    Times Django template backend renders for the sampled request. Includes
+    and nested render_to_string calls are only counted once.
+    """
+    global _template_timer_installed
+    if _template_timer_installed:
+        return
+    from django.template.backends.django import Template
+
+    original_render = Template.render
+
+    def timed_render(self, *args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None:
+            return original_render(self, *args, **kwargs)
+        profile._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original_render(self, *args, **kwargs)
+        finally:
+            profile._template_depth -= 1
+            if profile._template_depth == 0:
+                profile.template_time += time.perf_counter() - start
+
+    Template.render = timed_render
+    _template_timer_installed = True
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(samples):
+    """Aggregates samples ({'wall_ms': ..., ...} dicts) for one view."""
+    summary = {'requests': len(samples), 'n_plus_one': sum(1 for s in samples if s['repeated'])}
+    for metric in ('wall_ms', 'db_ms', 'template_ms', 'queries'):
+        values = [s[metric] for s in samples]
+        summary[metric] = {f'p{p}': percentile(values, p) for p in (50, 95, 99)}
+    repeated = Counter()
+    for sample in samples:
+        repeated.update(sample['repeated'].keys())
+    summary['top_repeated'] = [sql for sql, _ in repeated.most_common(3)]
+    return summary
+
+
+class ProfileStore:
+    """Bounded, per-view sample buffers for this process."""
+
+    def __init__(self, max_samples=1000, log_file=None):
+        self.max_samples = max_samples
+        self.log_file = log_file
+        self._samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self._lock = threading.Lock()
+
+    def add(self, view_name, sample):
+        with self._lock:
+            self._samples[view_name].append(sample)
+            if self.log_file:
+                with open(self.log_file, 'a') as log:
+                    log.write(json.dumps({'view': view_name, **sample}) + '\n')
+
+    def report(self):
+        with self._lock:
+            snapshot = {view: list(samples) for view, samples in self._samples.items()}
+        return {view: summarize(samples) for view, samples in snapshot.items()}
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+
+store = ProfileStore()
@@ -0,0 +1,156 @@
+"""
+Ranks a job's proposals for its client.
+
+Every proposal gets three components in [0, 1]:
+
+    rate_fit  1 for a bid at or under the budget, budget/rate above it
+    rating    the freelancer's average, shrunk towards RATING_PRIOR for
+              freelancers with few reviews, over 5
+    skills    the share of the job's skill tags the freelancer has
+
+and a weighted score. All of a job's proposals are scored together from
+three narrow queries, then sorted and paginated in memory; only the proposals
+on the page are loaded in full. The ranking is cached per job version, which
+a new, edited or deleted proposal or an edit to the job bumps.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.paginator import Paginator
+
+from .fragments import current_versions, fragment_cache
+from .models import Job, Profile, Proposal
+
+PROPOSALS_PER_PAGE = 10
+SHORTLIST_SIZE = 3
+
+WEIGHTS = {'rate_fit': 0.3, 'rating': 0.3, 'skills': 0.4}
+# A freelancer without reviews counts as RATING_PRIOR_WEIGHT reviews of RATING_PRIOR
+RATING_PRIOR = 3.0
+RATING_PRIOR_WEIGHT = 3
+
+# Sort key -> (component, descending); ties always fall back to the newest proposal
+SORTS = {
+    'score': ('score', True),
+    'rate': ('rate', False),
+    'rating': ('rating', True),
+    'skills': ('skills', True),
+    'newest': ('proposal_id', True),
+}
+SORT_CHOICES = [('score', 'Best match'), ('rate', 'Lowest rate'), ('rating', 'Top rated'),
+                ('skills', 'Skill match'), ('newest', 'Newest')]
+
+
+@dataclass
+class ProposalScore:
+    proposal_id: int
+    status: str
+    rate: float
+    rate_fit: float
+    rating: float
+    skills: float
+    score: float
+
+
+def rate_scores(rates, budget):
+    return [1.0 if rate <= budget else budget / rate for rate in rates] if budget > 0 else [0.0] * len(rates)
+
+
+def rating_scores(averages, counts):
+    return [
+        (average * count + RATING_PRIOR * RATING_PRIOR_WEIGHT) / (count + RATING_PRIOR_WEIGHT) / 5
+        for average, count in zip(averages, counts)
+    ]
+
+
+def skill_scores(freelancer_skills, job_skills):
+    if not job_skills:
+        return [0.0] * len(freelancer_skills)
+    return [len(skills & job_skills) / len(job_skills) for skills in freelancer_skills]
+
+
+def score_proposals(job):
+    """ProposalScores for every proposal of `job`, in three queries."""
+    rows = list(Proposal.objects.filter(job=job).order_by().values_list(
+        'pk', 'status', 'rate', 'freelancer_id', 'freelancer__profile__rating_avg',
+        'freelancer__profile__rating_count',
+    ))
+    if not rows:
+        return []
+    ids, statuses, rates, freelancer_ids, averages, counts = zip(*rows)
+
+    job_skills = set(Job.skill_tags.through.objects.filter(job=job).values_list('skill_id', flat=True))
+    skills_by_user = defaultdict(set)
+    if job_skills:
+        through = Profile.skill_tags.through.objects.filter(
+            profile__user_id__in=freelancer_ids, skill_id__in=job_skills,
+        )
+        for user_id, skill_id in through.values_list('profile__user_id', 'skill_id'):
+            skills_by_user[user_id].add(skill_id)
+
+    rates = [float(rate) for rate in rates]
+    components = {
+        'rate_fit': rate_scores(rates, float(job.budget)),
+        # Freelancers without a profile row get the prior
+        'rating': rating_scores([float(a or 0) for a in averages], [c or 0 for c in counts]),
+        'skills': skill_scores([skills_by_user[user_id] for user_id in freelancer_ids], job_skills),
+    }
+    scores = [
+        sum(WEIGHTS[name] * values[i] for name, values in components.items())
+        for i in range(len(rows))
+    ]
+    return [
+        ProposalScore(ids[i], statuses[i], rates[i], round(components['rate_fit'][i], 4),
+                      round(components['rating'][i], 4), round(components['skills'][i], 4), round(scores[i], 4))
+        for i in range(len(rows))
+    ]
+
+
+def job_ranking(job):
+    """
+    The job's ProposalScores, from the cache while the job version is current.
+    PROPOSAL_RANKING_CACHE_TIMEOUT = 0 turns the cache off. Rating changes
+    are picked up when the entry expires.
+    """
+    timeout = settings.PROPOSAL_RANKING_CACHE_TIMEOUT
+    if not timeout:
+        return score_proposals(job)
+    version_key = f'v:job:{job.pk}'
+    version = current_versions([version_key])[version_key]
+    cache = fragment_cache()
+    key = f'ranking:{job.pk}'
+    entry = cache.get(key)
+    if entry is not None and entry['version'] == version:
+        return entry['scores']
+    scores = score_proposals(job)
+    cache.set(key, {'version': version, 'scores': scores}, timeout)
+    return scores
+
+
+def sort_scores(scores, sort):
+    component, descending = SORTS.get(sort, SORTS['score'])
+    if descending:
+        return sorted(scores, key=lambda s: (getattr(s, component), s.proposal_id), reverse=True)
+    return sorted(scores, key=lambda s: (getattr(s, component), -s.proposal_id))
+
+
+def ranked_proposals(job, sort='score', page_number=1, per_page=PROPOSALS_PER_PAGE):
+    """
+    (page, shortlist): a Paginator page of the job's proposals in `sort`
+    order and the SHORTLIST_SIZE best-scoring pending ones. Both are Proposal
+    objects with `.ranking` set, loaded together in one query.
+    """
+    scores = job_ranking(job)
+    page = Paginator(sort_scores(scores, sort), per_page).get_page(page_number)
+    shortlist = [s for s in sort_scores(scores, 'score') if s.status == 'pending'][:SHORTLIST_SIZE]
+
+    wanted = {s.proposal_id: s for s in list(page.object_list) + shortlist}
+    proposals = Proposal.objects.filter(pk__in=wanted).select_related('freelancer') if wanted else []
+    by_id = {}
+    for proposal in proposals:
+        proposal.ranking = wanted[proposal.pk]
+        by_id[proposal.pk] = proposal
+    # A proposal deleted since the ranking was cached is skipped
+    page.object_list = [by_id[s.proposal_id] for s in page.object_list if s.proposal_id in by_id]
+    return page, [by_id[s.proposal_id] for s in shortlist if s.proposal_id in by_id]
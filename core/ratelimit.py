@@ -0,0 +1,202 @@
+"""
+Token-bucket rate limiting for the endpoints that write or search.
+
+    RATE_LIMITS = {
+        'signup': {'rate': '5/h', 'methods': ['POST']},
+        'search': {'rate': '60/m', 'burst': 20},
+    }
+
+RateLimitMiddleware applies RATE_LIMITS by URL name; @ratelimit('10/m')
+does the same for a single view. Buckets are per user when logged in and
+per client IP otherwise, and a request over the limit gets a 429 with
+Retry-After.
+
+A bucket of `burst` tokens refilling at `rate` is kept as one number, the
+time at which it will be full again (the GCRA form of a token bucket): a
+request is allowed while that time is less than a full bucket ahead of now.
+Where that number lives is the RATE_LIMIT_STORE. LocalMemoryStore keeps it in
+the process, so each worker enforces the limit on its own; CacheStore keeps it
+in a Django cache (RATE_LIMIT_CACHE) that workers, or hosts, can share.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+UNITS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+@dataclass(frozen=True)
+class Rate:
+    count: int
+    period: float
+    burst: int
+
+    @property
+    def interval(self):
+        """Seconds it takes to earn one token back."""
+        return self.period / self.count
+
+    @property
+    def tolerance(self):
+        # How far ahead of now the bucket may be full again and still have a token
+        return self.interval * (self.burst - 1)
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate, burst=None):
+    """'10/m' or '100/15m' -> Rate. The burst defaults to the count."""
+    try:
+        count, period = rate.split('/')
+        multiplier, unit = period[:-1] or '1', period[-1]
+        parsed = Rate(int(count), int(multiplier) * UNITS[unit], int(burst or count))
+    except (ValueError, KeyError):
+        raise ValueError(f'Invalid rate {rate!r}; expected "<count>/<period>", e.g. "10/m" or "100/15m".') from None
+    if parsed.count < 1 or parsed.burst < 1:
+        raise ValueError(f'Invalid rate {rate!r}; the count and burst must be positive.')
+    return parsed
+
+
+def advance(full_at, rate, now):
+    """(new full_at, retry_after): retry_after is 0 when the request is allowed."""
+    full_at = max(full_at or now, now)
+    if full_at - now > rate.tolerance:
+        return full_at, full_at - now - rate.tolerance
+    return full_at + rate.interval, 0.0
+
+
+class BaseStore:
+    """Keeps buckets; hit() takes a token from one and returns advance()'s retry_after."""
+
+    def hit(self, key, rate, now=None):
+        raise NotImplementedError
+
+
+class LocalMemoryStore(BaseStore):
+    """
+    Buckets in a dict in this process. Full buckets carry no state, so they
+    are dropped when the store grows past `max_keys`; the least recently used
+    go next if that is not enough.
+    """
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def hit(self, key, rate, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            full_at, retry_after = advance(self.buckets.get(key), rate, now)
+            self.buckets[key] = full_at
+            self.buckets.move_to_end(key)
+            if len(self.buckets) > self.max_keys:
+                self.prune(now)
+        return retry_after
+
+    def prune(self, now):
+        for key in [key for key, full_at in self.buckets.items() if full_at <= now]:
+            del self.buckets[key]
+        while len(self.buckets) > self.max_keys * 0.9:
+            self.buckets.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheStore(BaseStore):
+    """
+    Buckets in the RATE_LIMIT_CACHE cache, shared by everything using it. The
+    read and write are not atomic, so requests racing on one bucket can each
+    get the last token; the overshoot is bounded by the number of workers.
+    """
+
+    def __init__(self, alias=None):
+        self.cache = caches[alias or settings.RATE_LIMIT_CACHE]
+
+    def hit(self, key, rate, now=None):
+        now = time.time() if now is None else now
+        key = f'ratelimit:{key}'
+        full_at, retry_after = advance(self.cache.get(key), rate, now)
+        if not retry_after:
+            # Expires once the bucket is full again, when it has nothing to remember
+            self.cache.set(key, full_at, timeout=math.ceil(full_at - now))
+        return retry_after
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The process-wide store named by RATE_LIMIT_STORE."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(settings.RATE_LIMIT_STORE)()
+    return _store
+
+
+def client_ip(request):
+    """
+    The client's address. Behind RATE_LIMIT_TRUSTED_PROXIES proxies it is the
+    entry that many hops from the end of X-Forwarded-For, since anything
+    before that the client could have written itself.
+    """
+    proxies = settings.RATE_LIMIT_TRUSTED_PROXIES
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(',')]
+        return hops[max(len(hops) - proxies, 0)]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_key(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'ip:{client_ip(request)}'
+
+
+def check(request, scope, rate):
+    """Takes a token from the client's `scope` bucket; returns seconds to wait, 0 if allowed."""
+    return get_store().hit(f'{scope}:{client_key(request)}', rate)
+
+
+def too_many_requests(retry_after):
+    seconds = max(1, math.ceil(retry_after))
+    response = HttpResponse(f'Too many requests. Try again in {seconds} seconds.', status=429,
+                            content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(seconds)
+    return response
+
+
+def ratelimit(rate, burst=None, methods=None, scope=None):
+    """
+    Limits a view to `rate` per user or IP. `methods` restricts the limit to
+    those HTTP methods; `scope` names the bucket and defaults to the view.
+    """
+    parsed = parse_rate(rate, burst)
+    methods = {method.upper() for method in methods} if methods else None
+
+    def decorator(view):
+        name = scope or f'{view.__module__}.{view.__qualname__}'
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATE_LIMIT_ENABLED and (methods is None or request.method in methods):
+                retry_after = check(request, name, parsed)
+                if retry_after:
+                    return too_many_requests(retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
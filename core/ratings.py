@@ -0,0 +1,64 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import Count, DecimalField, F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, Round
+
+from .models import Profile, Review
+
+TWO_PLACES = Decimal('0.01')
+
+
+def average(rating_sum, rating_count):
+    if not rating_count:
+        return Decimal('0')
+    return (Decimal(rating_sum) / rating_count).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+
+def add_rating(freelancer_id, rating):
+    """
+    Folds one new review into the freelancer's aggregates with a single
+    UPDATE. The right-hand side reads the row's current values, so concurrent
+    reviews cannot overwrite each other. Call it inside the transaction that
+    saves the review.
+    """
+    new_sum = F('rating_sum') + rating
+    new_count = F('rating_count') + 1
+    Profile.objects.filter(user_id=freelancer_id).update(
+        rating_count=new_count,
+        rating_sum=new_sum,
+        rating_avg=Cast(
+            Round(Cast(new_sum, FloatField()) / new_count, 2),
+            DecimalField(max_digits=3, decimal_places=2)
+        ),
+    )
+
+
+def reconcile_ratings(batch_size=1000):
+    """
+    Recomputes the aggregates from the reviews table and rewrites the profiles
+    that drifted. Returns the number of profiles fixed.
+    """
+    reviews = Review.objects.filter(freelancer=OuterRef('user_id')).order_by().values('freelancer')
+    drifted = Profile.objects.annotate(
+        expected_count=Coalesce(Subquery(reviews.annotate(total=Count('pk')).values('total')), 0),
+        expected_sum=Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), 0),
+    ).exclude(
+        rating_count=F('expected_count'),
+        rating_sum=F('expected_sum'),
+    ).only('pk', 'rating_count', 'rating_sum', 'rating_avg')
+
+    fixed = 0
+    batch = []
+    for profile in drifted.iterator(chunk_size=batch_size):
+        profile.rating_count = profile.expected_count
+        profile.rating_sum = profile.expected_sum
+        profile.rating_avg = average(profile.expected_sum, profile.expected_count)
+        batch.append(profile)
+        if len(batch) >= batch_size:
+            Profile.objects.bulk_update(batch, ['rating_count', 'rating_sum', 'rating_avg'])
+            fixed += len(batch)
+            batch = []
+    if batch:
+        Profile.objects.bulk_update(batch, ['rating_count', 'rating_sum', 'rating_avg'])
+        fixed += len(batch)
+    return fixed
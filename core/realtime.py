@@ -0,0 +1,109 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class BaseBroker:
+    """
+    Publish/subscribe transport for real-time events.
+
+    publish() is synchronous so it can be called from regular views and signal
+    handlers; subscribe() is called from async code and returns an object with
+    an awaitable get(timeout) and a close() method.
+    """
+
+    def publish(self, channel, payload):
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        raise NotImplementedError
+
+    def has_subscribers(self, channel):
+        """
+        False only when nobody can be listening on `channel`, so publishers
+        may skip building the payload. Brokers that cannot tell say True.
+        """
+        return True
+
+
+class LocalSubscription:
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, payload):
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # A stalled client drops events; it catches up through Last-Event-ID on reconnect
+            pass
+
+    async def get(self, timeout=None):
+        """Next payload, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker(BaseBroker):
+    """
+    In-process broker: fans events out to subscribers in the same Python
+    process. Needs no outside services, so it suits a single ASGI worker; run
+    several workers behind a shared broker implementation instead.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            # Publishers usually run in a sync worker thread, not on the subscriber's loop
+            subscription.loop.call_soon_threadsafe(subscription.offer, payload)
+
+    def subscribe(self, channel):
+        subscription = LocalSubscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+    def has_subscribers(self, channel):
+        return self.subscriber_count(channel) > 0
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    # The broker holds live subscriptions, so every caller must share one instance
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.REALTIME_BROKER)()
+    return _broker
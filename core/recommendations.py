@@ -0,0 +1,237 @@
+"""
+"Recommended for you" jobs for freelancers.
+
+Jobs and freelancers are sparse TF-IDF vectors over normalized skill tags: a
+skill shared by few open jobs weighs more than one every job asks for. A
+freelancer's vector is their profile skills plus, at half weight, the skills
+of jobs they were hired for. Candidates are scored through an inverted index
+(only jobs sharing a skill are touched), by cosine similarity blended with how
+close the budget is to what the freelancer usually works for.
+
+Top lists are computed in batches (`precompute`, run by the
+precompute_recommendations command) and cached per freelancer. An entry is
+stale once a job is posted or edited (OPEN_JOBS_VERSION is bumped) or
+the freelancer's profile changes; the dashboard keeps showing a stale entry
+and queues a refresh_recommendations task for that freelancer, so no request
+builds the index or scores jobs itself.
+"""
+import hashlib
+import heapq
+import math
+import threading
+from collections import defaultdict
+from statistics import median
+
+from .fragments import OPEN_JOBS_VERSION, current_versions, fragment_cache
+from .models import Job, Profile, Proposal
+from .taskqueue import enqueue, task
+
+# Kept per freelancer; more than are shown, since closed jobs and jobs they
+# have applied to since are dropped when the list is read
+RECOMMENDATIONS_KEPT = 30
+RECOMMENDATIONS_SHOWN = 5
+RECOMMENDATIONS_TIMEOUT = 24 * 60 * 60
+PRECOMPUTE_BATCH_SIZE = 500
+
+SKILL_WEIGHT = 0.8
+BUDGET_WEIGHT = 0.2
+HISTORY_WEIGHT = 0.5
+# Without past hires, a budget is compared with this many hours at the profile's rate
+REFERENCE_HOURS = 20
+
+_index = (None, None)
+_index_lock = threading.Lock()
+
+
+class JobIndex:
+    """Open jobs as normalized TF-IDF vectors, stored as an inverted index."""
+
+    def __init__(self, job_skills, budgets):
+        self.budgets = budgets
+        document_frequency = defaultdict(int)
+        for skills in job_skills.values():
+            for skill_id in skills:
+                document_frequency[skill_id] += 1
+        self.size = len(job_skills)
+        self.idf = {skill_id: self.inverse_frequency(count) for skill_id, count in document_frequency.items()}
+
+        self.postings = defaultdict(list)
+        for job_id, skills in job_skills.items():
+            norm = math.sqrt(sum(self.idf[skill_id] ** 2 for skill_id in skills))
+            for skill_id in skills:
+                self.postings[skill_id].append((job_id, self.idf[skill_id] / norm))
+
+    @classmethod
+    def build(cls):
+        """Two queries, however many jobs are open."""
+        job_skills = defaultdict(set)
+        through = Job.skill_tags.through.objects.filter(job__is_open=True)
+        for job_id, skill_id in through.values_list('job_id', 'skill_id').iterator(chunk_size=5000):
+            job_skills[job_id].add(skill_id)
+        budgets = dict(Job.objects.filter(is_open=True).values_list('pk', 'budget').iterator(chunk_size=5000))
+        return cls(job_skills, budgets)
+
+    def inverse_frequency(self, count):
+        # Smoothed so a skill no open job asks for still has a finite weight
+        return math.log((self.size + 1) / (count + 1)) + 1
+
+    def vector(self, weights):
+        """Normalized TF-IDF vector of a {skill_id: term weight} mapping."""
+        vector = {skill_id: weight * self.idf.get(skill_id, self.inverse_frequency(0))
+                  for skill_id, weight in weights.items()}
+        norm = math.sqrt(sum(value ** 2 for value in vector.values()))
+        return {skill_id: value / norm for skill_id, value in vector.items()} if norm else {}
+
+    def recommend(self, freelancer, limit=RECOMMENDATIONS_KEPT):
+        """[(job_id, score)] best first, for a FreelancerVector."""
+        scores = defaultdict(float)
+        for skill_id, weight in freelancer.vector.items():
+            for job_id, job_weight in self.postings.get(skill_id, ()):
+                scores[job_id] += weight * job_weight
+        ranked = []
+        for job_id, similarity in scores.items():
+            if job_id in freelancer.excluded:
+                continue
+            score = SKILL_WEIGHT * similarity + BUDGET_WEIGHT * budget_fit(self.budgets[job_id], freelancer.budget)
+            ranked.append((job_id, round(score, 6)))
+        # Ties go to the newer job
+        return heapq.nlargest(limit, ranked, key=lambda item: (item[1], item[0]))
+
+
+class FreelancerVector:
+    def __init__(self, vector, budget, excluded):
+        self.vector = vector
+        self.budget = budget
+        self.excluded = excluded
+
+
+def budget_fit(budget, reference):
+    """1 when the budget matches the reference, falling towards 0 as the ratio grows."""
+    if not reference or not budget or budget <= 0:
+        return 0.0
+    budget, reference = float(budget), float(reference)
+    return min(budget, reference) / max(budget, reference)
+
+
+def freelancer_vectors(index, user_ids):
+    """FreelancerVectors for a batch of freelancers, in five queries."""
+    user_ids = list(user_ids)
+    weights = defaultdict(lambda: defaultdict(float))
+    through = Profile.skill_tags.through.objects.filter(profile__user_id__in=user_ids)
+    for user_id, skill_id in through.values_list('profile__user_id', 'skill_id'):
+        weights[user_id][skill_id] += 1
+
+    hired = Proposal.objects.filter(freelancer_id__in=user_ids, status='accepted')
+    hired_skills = Job.skill_tags.through.objects.filter(
+        job__proposals__freelancer_id__in=user_ids, job__proposals__status='accepted',
+    ).values_list('job__proposals__freelancer_id', 'skill_id')
+    for user_id, skill_id in hired_skills:
+        weights[user_id][skill_id] += HISTORY_WEIGHT
+    hired_budgets = defaultdict(list)
+    for user_id, budget in hired.values_list('freelancer_id', 'job__budget'):
+        hired_budgets[user_id].append(budget)
+
+    applied = defaultdict(set)
+    open_proposals = Proposal.objects.filter(freelancer_id__in=user_ids, job__is_open=True)
+    for user_id, job_id in open_proposals.values_list('freelancer_id', 'job_id'):
+        applied[user_id].add(job_id)
+
+    rates = dict(Profile.objects.filter(user_id__in=user_ids).values_list('user_id', 'hourly_rate'))
+    vectors = {}
+    for user_id in user_ids:
+        if hired_budgets[user_id]:
+            budget = median(hired_budgets[user_id])
+        elif rates.get(user_id):
+            budget = rates[user_id] * REFERENCE_HOURS
+        else:
+            budget = None
+        vectors[user_id] = FreelancerVector(index.vector(weights[user_id]), budget, applied[user_id])
+    return vectors
+
+
+def cache_key(user_id):
+    return f'recommendations:{user_id}'
+
+
+def entry_versions(user_ids):
+    """What each freelancer's entry depends on: the job index and their profile."""
+    keys = [OPEN_JOBS_VERSION] + [f'v:profile:{user_id}' for user_id in user_ids]
+    versions = current_versions(keys)
+    return {user_id: (versions[OPEN_JOBS_VERSION], versions[f'v:profile:{user_id}']) for user_id in user_ids}
+
+
+def get_index(version):
+    """The JobIndex for the current job version, rebuilt once per process when it changes."""
+    global _index
+    with _index_lock:
+        built_for, index = _index
+        if built_for != version:
+            index = JobIndex.build()
+            _index = (version, index)
+        return index
+
+
+def compute(user_ids, versions=None):
+    """Scores and caches the recommendations of `user_ids`; returns them by user id."""
+    versions = versions or entry_versions(user_ids)
+    index = get_index(versions[user_ids[0]][0]) if user_ids else None
+    results = {user_id: index.recommend(vector) for user_id, vector in freelancer_vectors(index, user_ids).items()}
+    fragment_cache().set_many(
+        {cache_key(user_id): {'version': versions[user_id], 'jobs': jobs} for user_id, jobs in results.items()},
+        timeout=RECOMMENDATIONS_TIMEOUT,
+    )
+    return results
+
+
+def precompute(user_ids=None, batch_size=PRECOMPUTE_BATCH_SIZE):
+    """Refreshes the cached recommendations of every freelancer, or of `user_ids`, in batches."""
+    if user_ids is None:
+        user_ids = Profile.objects.filter(role='freelancer').order_by('user_id').values_list('user_id', flat=True)
+        user_ids = user_ids.iterator(chunk_size=batch_size)
+    done = 0
+    batch = []
+    for user_id in user_ids:
+        batch.append(user_id)
+        if len(batch) >= batch_size:
+            done += len(compute(batch))
+            batch = []
+    if batch:
+        done += len(compute(batch))
+    return done
+
+
+@task(max_attempts=3)
+def refresh_recommendations(user_ids):
+    compute(list(user_ids))
+
+
+def schedule_refresh(user_id, version):
+    """Queues one refresh per freelancer and entry version, however many requests see it stale."""
+    digest = hashlib.sha256(repr(version).encode()).hexdigest()[:16]
+    key = f'recommendations:{user_id}:{digest}'
+    # The cache spares the INSERT the idempotency key would reject anyway
+    if fragment_cache().add(f'{key}:queued', True, timeout=RECOMMENDATIONS_TIMEOUT):
+        enqueue(refresh_recommendations, key=key, user_ids=[user_id])
+
+
+def recommended_jobs(user, limit=RECOMMENDATIONS_SHOWN):
+    """
+    The freelancer's top open jobs they have not applied to, with `.score`
+    set, from their cached entry: two cache reads and one query. A stale
+    entry is still shown while a refresh is queued; without any entry the
+    list is empty until the refresh has run.
+    """
+    versions = entry_versions([user.pk])
+    entry = fragment_cache().get(cache_key(user.pk))
+    if entry is None or entry['version'] != versions[user.pk]:
+        schedule_refresh(user.pk, versions[user.pk])
+    ranked = entry['jobs'] if entry is not None else []
+    if not ranked:
+        return []
+    scores = dict(ranked)
+    jobs = (Job.objects.filter(pk__in=scores, is_open=True).exclude(proposals__freelancer=user)
+            .select_related('client'))
+    jobs = sorted(jobs, key=lambda job: (scores[job.pk], job.pk), reverse=True)[:limit]
+    for job in jobs:
+        job.score = scores[job.pk]
+    return jobs
@@ -0,0 +1,70 @@
+from functools import wraps
+
+from django.contrib.auth.views import redirect_to_login
+from django.shortcuts import redirect
+
+from .models import Profile
+
+ROLE_SESSION_KEY = '_profile_role'
+
+
+def load_profile(user):
+    """
+    Fetches the user's profile in one query and attaches it to the user, so
+    later `user.profile` reads in views and templates are free.
+    """
+    profile = Profile.objects.filter(user_id=user.pk).first()
+    if profile is not None:
+        user.profile = profile
+    return profile
+
+
+def get_role(request):
+    """
+    'client', 'freelancer' or None (anonymous, or signed up through Google
+    and not through choose_role yet). Cached in the session together with the
+    user id; views that create or edit a profile refresh it with remember_role().
+    """
+    if not request.user.is_authenticated:
+        return None
+    return session_role(request.session, request.user)
+
+
+def session_role(session, user):
+    cached = session.get(ROLE_SESSION_KEY)
+    if cached and cached[0] == user.pk:
+        return cached[1]
+    profile = load_profile(user)
+    if profile is None:
+        return None
+    session[ROLE_SESSION_KEY] = (user.pk, profile.role)
+    return profile.role
+
+
+def remember_role(request, role):
+    request.session[ROLE_SESSION_KEY] = (request.user.pk, role)
+    request.role = role
+
+
+def role_required(*roles):
+    """
+    Lets the view run only for users whose role is one of `roles`. Anonymous
+    users go to the login page, users without a role to choose_role, and
+    everyone else to the login page too, like user_passes_test did.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return redirect_to_login(request.get_full_path())
+            if request.role is None:
+                return redirect('choose_role')
+            if request.role not in roles:
+                return redirect_to_login(request.get_full_path())
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+client_required = role_required('client')
+freelancer_required = role_required('freelancer')
@@ -0,0 +1,247 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Profile, Job
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class SearchResults:
+    """
+    A lazily evaluated, ranked result list.
+
+    It implements just enough of the sequence protocol (count() and slicing)
+    for django.core.paginator.Paginator, so only the requested page is ever
+    materialised.
+    """
+
+    def __init__(self, count_fn, fetch_fn):
+        self._count_fn = count_fn
+        self._fetch_fn = fetch_fn
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self._count_fn()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start = key.start or 0
+            stop = key.stop if key.stop is not None else self.count()
+            return self._fetch_fn(start, max(stop - start, 0))
+        return self._fetch_fn(key, 1)[0]
+
+
+class BaseSearchBackend:
+    def search_talent(self, query, skill=None, min_rating=None, sort='relevance'):
+        raise NotImplementedError
+
+    def search_jobs(self, query, skill=None):
+        raise NotImplementedError
+
+    @staticmethod
+    def filter_talent(results, skill=None, min_rating=None):
+        # Both filters are index lookups: core_skill.slug and the M2M table,
+        # and Profile(role, rating_avg)
+        if skill:
+            results = results.filter(skill_tags__slug=skill)
+        if min_rating:
+            results = results.filter(rating_avg__gte=min_rating)
+        return results
+
+    def browse_talent(self, skill=None, min_rating=None, sort='relevance'):
+        results = self.filter_talent(
+            Profile.objects.select_related('user').filter(role='freelancer', user__is_active=True),
+            skill, min_rating
+        )
+        if sort == 'rating':
+            return results.order_by('-rating_avg', '-rating_count', '-pk')
+        return results.order_by('-pk')
+
+    def browse_jobs(self, skill):
+        return Job.objects.select_related('client').filter(
+            is_open=True,
+            skill_tags__slug=skill
+        ).order_by('-created_at', '-pk')
+
+    def index_job(self, job):
+        pass
+
+    def remove_job(self, job_id):
+        pass
+
+    def index_profile(self, profile):
+        pass
+
+    def remove_profile(self, profile_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """Unranked substring matching. Needs no index, but scans every row."""
+
+    def search_talent(self, query, skill=None, min_rating=None, sort='relevance'):
+        results = Profile.objects.select_related('user').filter(
+            role='freelancer',
+            user__is_active=True
+        ).filter(
+            Q(skills__icontains=query) |
+            Q(bio__icontains=query) |
+            Q(title__icontains=query) |
+            Q(user__username__icontains=query)
+        )
+        results = self.filter_talent(results, skill, min_rating).distinct()
+        if sort == 'rating':
+            return results.order_by('-rating_avg', '-rating_count', '-pk')
+        return results.order_by('-pk')
+
+    def search_jobs(self, query, skill=None):
+        results = Job.objects.select_related('client').filter(
+            is_open=True
+        ).filter(
+            Q(title__icontains=query) |
+            Q(description__icontains=query) |
+            Q(skills_required__icontains=query)
+        )
+        if skill:
+            results = results.filter(skill_tags__slug=skill)
+        return results.distinct().order_by('-created_at', '-pk')
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    Ranked search on SQLite FTS5 virtual tables.
+
+    The tables only hold searchable rows (open jobs, active freelancers), keyed
+    by the model's primary key as rowid. They are kept in sync by the signal
+    handlers in core.signals and can be rebuilt with `manage.py rebuild_search_index`.
+    """
+
+    job_table = 'core_job_fts'
+    profile_table = 'core_profile_fts'
+    # bm25 column weights; columns are listed in table order
+    job_weights = (4.0, 1.0, 3.0)          # title, description, skills_required
+    profile_weights = (2.0, 3.0, 4.0, 1.0)  # username, title, skills, bio
+
+    @staticmethod
+    def to_match_expression(query):
+        # Quote every token so user input can never be parsed as FTS5 syntax,
+        # and prefix-match so "djan" still finds "django"
+        tokens = TOKEN_RE.findall(query)
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def _ranked(self, table, weights, model, query, related, skill=None, filters=(), order=()):
+        """
+        Runs a MATCH against `table`, joined to the model's table as `m` so
+        `filters` ((sql, params) pairs) and `order` (SQL terms placed ahead of
+        the bm25 rank) can use its indexed columns.
+        """
+        expression = self.to_match_expression(query)
+        if not expression:
+            return SearchResults(lambda: 0, lambda start, limit: [])
+        rank = f"bm25({table}, {', '.join(str(w) for w in weights)})"
+
+        source = f'{table} JOIN {model._meta.db_table} m ON m.id = {table}.rowid'
+        where = f'{table} MATCH %s'
+        params = [expression]
+        if skill:
+            # Narrow the match to rows linked to the skill via the M2M table's index
+            through = model.skill_tags.through._meta
+            owner_column = model.skill_tags.field.m2m_column_name()
+            where += (
+                f' AND m.id IN (SELECT t.{owner_column} FROM {through.db_table} t '
+                f'JOIN core_skill s ON s.id = t.skill_id WHERE s.slug = %s)'
+            )
+            params.append(skill)
+        for sql, sql_params in filters:
+            where += f' AND {sql}'
+            params.extend(sql_params)
+        order_by = ', '.join([*order, rank])
+
+        def count():
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM {source} WHERE {where}', params)
+                return cursor.fetchone()[0]
+
+        def fetch(start, limit):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT m.id FROM {source} WHERE {where} ORDER BY {order_by} LIMIT %s OFFSET %s',
+                    params + [limit, start]
+                )
+                ids = [row[0] for row in cursor.fetchall()]
+            objects = model.objects.select_related(related).in_bulk(ids)
+            return [objects[pk] for pk in ids if pk in objects]
+
+        return SearchResults(count, fetch)
+
+    def search_talent(self, query, skill=None, min_rating=None, sort='relevance'):
+        filters = [('m.rating_avg >= %s', [float(min_rating)])] if min_rating else []
+        order = ['m.rating_avg DESC', 'm.rating_count DESC'] if sort == 'rating' else []
+        return self._ranked(self.profile_table, self.profile_weights, Profile, query, 'user', skill, filters, order)
+
+    def search_jobs(self, query, skill=None):
+        return self._ranked(self.job_table, self.job_weights, Job, query, 'client', skill)
+
+    def index_job(self, job):
+        if not job.is_open:
+            self.remove_job(job.pk)
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.job_table} WHERE rowid = %s', [job.pk])
+            cursor.execute(
+                f'INSERT INTO {self.job_table} (rowid, title, description, skills_required) VALUES (%s, %s, %s, %s)',
+                [job.pk, job.title, job.description, job.skills_required or '']
+            )
+
+    def remove_job(self, job_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.job_table} WHERE rowid = %s', [job_id])
+
+    def index_profile(self, profile):
+        if profile.role != 'freelancer' or not profile.user.is_active:
+            self.remove_profile(profile.pk)
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.profile_table} WHERE rowid = %s', [profile.pk])
+            cursor.execute(
+                f'INSERT INTO {self.profile_table} (rowid, username, title, skills, bio) VALUES (%s, %s, %s, %s, %s)',
+                [profile.pk, profile.user.username, profile.title or '', profile.skills or '', profile.bio or '']
+            )
+
+    def remove_profile(self, profile_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.profile_table} WHERE rowid = %s', [profile_id])
+
+    def rebuild(self):
+        # One INSERT ... SELECT per table, so a full rebuild never pulls rows into Python
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.job_table}')
+            cursor.execute(
+                f"INSERT INTO {self.job_table} (rowid, title, description, skills_required) "
+                f"SELECT id, title, description, COALESCE(skills_required, '') FROM core_job WHERE is_open"
+            )
+            cursor.execute(f'DELETE FROM {self.profile_table}')
+            cursor.execute(
+                f"INSERT INTO {self.profile_table} (rowid, username, title, skills, bio) "
+                f"SELECT p.id, u.username, COALESCE(p.title, ''), COALESCE(p.skills, ''), COALESCE(p.bio, '') "
+                f"FROM core_profile p JOIN auth_user u ON u.id = p.user_id "
+                f"WHERE p.role = 'freelancer' AND u.is_active"
+            )
+            cursor.execute(f"INSERT INTO {self.job_table} ({self.job_table}) VALUES ('optimize')")
+            cursor.execute(f"INSERT INTO {self.profile_table} ({self.profile_table}) VALUES ('optimize')")
+
+
+def get_search_backend(path=None):
+    return import_string(path or settings.SEARCH_BACKEND)()
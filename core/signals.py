@@ -0,0 +1,191 @@
+import os
+
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .messaging import publish_message
+from .notifications import unread_count
+from .fragments import OPEN_JOBS_VERSION, invalidate
+from .models import Profile, Job, Message, Proposal, Review, Skill, Thread
+from .search import get_search_backend
+from .roles import session_role
+from .skills import sync_skill_tags
+from .thumbnails import schedule_renditions
+
+
+# --- Search index sync ---
+
+@receiver(post_save, sender=Job)
+def index_job(sender, instance, **kwargs):
+    get_search_backend().index_job(instance)
+
+
+@receiver(post_delete, sender=Job)
+def unindex_job(sender, instance, **kwargs):
+    get_search_backend().remove_job(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+def index_profile(sender, instance, **kwargs):
+    get_search_backend().index_profile(instance)
+
+
+@receiver(post_delete, sender=Profile)
+def unindex_profile(sender, instance, **kwargs):
+    get_search_backend().remove_profile(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def reindex_user_profile(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which is not searchable
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    profile = Profile.objects.filter(user=instance).first()
+    if profile is not None:
+        profile.user = instance
+        get_search_backend().index_profile(profile)
+
+
+# --- Skill tags ---
+
+@receiver(post_save, sender=Job)
+def sync_job_skills(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'skills_required' in update_fields:
+        sync_skill_tags(instance, instance.skills_required)
+
+
+@receiver(post_save, sender=Profile)
+def sync_profile_skills(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'skills' in update_fields:
+        sync_skill_tags(instance, instance.skills)
+
+
+# --- Profile picture renditions ---
+
+@receiver(post_save, sender=Profile)
+def thumbnail_profile_picture(sender, instance, **kwargs):
+    picture = instance.profile_picture
+    if picture and picture.name != instance.thumbnail_source:
+        schedule_renditions(instance)
+
+
+# --- Attachment blobs ---
+
+@receiver(pre_save, sender=Proposal)
+def remember_attachment_name(sender, instance, **kwargs):
+    # Until the field is saved, the file still carries the uploaded name
+    if instance.attachment and not instance.attachment._committed:
+        instance.attachment_name = os.path.basename(instance.attachment.name)
+
+
+@receiver(pre_save, sender=Message)
+def remember_file_name(sender, instance, **kwargs):
+    if instance.file and not instance.file._committed:
+        instance.file_name = os.path.basename(instance.file.name)
+
+
+@receiver(post_delete, sender=Proposal)
+def release_attachment(sender, instance, **kwargs):
+    if instance.attachment:
+        instance.attachment.storage.release(instance.attachment.name)
+
+
+@receiver(post_delete, sender=Message)
+def release_message_file(sender, instance, **kwargs):
+    if instance.file:
+        instance.file.storage.release(instance.file.name)
+
+
+# --- Session role cache ---
+
+@receiver(user_logged_in)
+def cache_role_on_login(sender, request, user, **kwargs):
+    # Warms the cache ProfileRoleMiddleware reads; logins are rare, requests are not
+    if request is not None and hasattr(request, 'session'):
+        session_role(request.session, user)
+
+
+# --- Notifications ---
+
+@receiver(user_logged_in)
+def cache_unread_count_on_login(sender, user, **kwargs):
+    # Every page shows the badge; fill its cache once rather than on the first page
+    unread_count(user)
+
+
+# --- Real-time messaging ---
+
+@receiver(post_save, sender=Message)
+def push_message(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: publish_message(instance))
+
+
+# --- Fragment cache invalidation ---
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job_fragments(sender, instance, **kwargs):
+    # The client's profile lists their posted jobs
+    invalidate(f'v:job:{instance.pk}', f'v:profile:{instance.client_id}', OPEN_JOBS_VERSION)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_fragments(sender, instance, **kwargs):
+    invalidate(f'v:profile:{instance.user_id}')
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_fragments(sender, instance, created, update_fields=None, **kwargs):
+    # Usernames are rendered in their jobs' fragments and in the reviews on
+    # other freelancers' profiles; logins only touch last_login
+    if created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    job_ids = list(Job.objects.filter(client=instance).values_list('pk', flat=True))
+    reviewed = Review.objects.filter(client=instance).order_by().values_list('freelancer_id', flat=True).distinct()
+    keys = [f'v:profile:{instance.pk}', *(f'v:job:{pk}' for pk in job_ids), *(f'v:profile:{pk}' for pk in reviewed)]
+    if job_ids:
+        keys.append(OPEN_JOBS_VERSION)
+    invalidate(*keys)
+
+
+@receiver(post_save, sender=Skill)
+@receiver(pre_delete, sender=Skill)
+def invalidate_skill_fragments(sender, instance, created=False, **kwargs):
+    # Before a delete, while the tags still point at the skill
+    if created:
+        return
+    job_ids = list(instance.jobs.values_list('pk', flat=True))
+    if job_ids:
+        invalidate(OPEN_JOBS_VERSION, *(f'v:job:{pk}' for pk in job_ids))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_fragments(sender, instance, **kwargs):
+    keys = [f'v:profile:{instance.freelancer_id}']
+    if instance.job_id:
+        keys.append(f'v:job:{instance.job_id}')
+    invalidate(*keys)
+
+
+@receiver(post_save, sender=Proposal)
+@receiver(post_delete, sender=Proposal)
+def invalidate_proposal_fragments(sender, instance, **kwargs):
+    invalidate(f'v:job:{instance.job_id}')
+
+
+@receiver(post_save, sender=Thread)
+@receiver(post_delete, sender=Thread)
+def invalidate_thread_lists(sender, instance, **kwargs):
+    invalidate(f'v:threads:{instance.client_id}', f'v:threads:{instance.freelancer_id}')
+
+
+@receiver(post_save, sender=Message)
+@receiver(post_delete, sender=Message)
+def invalidate_thread_messages(sender, instance, **kwargs):
+    invalidate(f'v:thread:{instance.thread_id}')
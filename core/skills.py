@@ -0,0 +1,44 @@
+import re
+
+from django.utils.text import slugify
+
+from .models import Skill
+
+SEPARATOR_RE = re.compile(r'[,;\n]+')
+MAX_SKILL_LENGTH = 50
+# Spelled out before slugifying, which would drop them: C++, C# and C stay apart
+SYMBOLS = [(re.compile(r'\+'), ' plus '), (re.compile(r'#'), ' sharp '), (re.compile(r'^\.'), 'dot ')]
+
+
+def skill_slug(name):
+    for pattern, word in SYMBOLS:
+        name = pattern.sub(word, name)
+    return slugify(name)[:MAX_SKILL_LENGTH]
+
+
+def parse_skills(text):
+    """Splits a free-text skills string into unique (slug, name) pairs, keeping order."""
+    parsed = {}
+    for part in SEPARATOR_RE.split(text or ''):
+        name = ' '.join(part.split())[:MAX_SKILL_LENGTH]
+        slug = skill_slug(name)
+        if slug and slug not in parsed:
+            parsed[slug] = name
+    return list(parsed.items())
+
+
+def get_or_create_skills(pairs):
+    """Returns Skill rows for the given (slug, name) pairs in at most three queries."""
+    if not pairs:
+        return []
+    slugs = [slug for slug, _ in pairs]
+    existing = {skill.slug: skill for skill in Skill.objects.filter(slug__in=slugs)}
+    missing = [Skill(slug=slug, name=name) for slug, name in pairs if slug not in existing]
+    if missing:
+        Skill.objects.bulk_create(missing, ignore_conflicts=True)
+        existing.update({skill.slug: skill for skill in Skill.objects.filter(slug__in=slugs)})
+    return [existing[slug] for slug in slugs if slug in existing]
+
+
+def sync_skill_tags(instance, text):
+    instance.skill_tags.set(get_or_create_skills(parse_skills(text)))
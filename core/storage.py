@@ -0,0 +1,112 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+BLOB_PREFIX = 'blobs'
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every file under the SHA-256 of its content, so identical uploads
+    share one file on disk:
+
+        blobs/3a/3a7bd3e2360a3d29eea436fcfb7e44c735d117c42d1c1835420b6b9942dd4f1b.pdf
+
+    The upload is streamed chunk by chunk into a temporary file next to its
+    final location while being hashed, then renamed into place. Each save adds
+    a reference to the core.Blob row of that name; release() drops one and
+    deletes the file with the last.
+    """
+
+    def _save(self, name, content):
+        extension = posixpath.splitext(name)[1].lower()
+        staging = os.path.join(self.location, BLOB_PREFIX, 'tmp')
+        os.makedirs(staging, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=staging)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks(HASH_CHUNK_SIZE):
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+                    size += len(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+
+            sha256 = digest.hexdigest()
+            blob_name = posixpath.join(BLOB_PREFIX, sha256[:2], sha256 + extension)
+            final_path = self.path(blob_name)
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            # The reference is taken and the file renamed into place (always,
+            # even over an identical blob) under one write lock, which collect()
+            # holds while it deletes a row and its file: a collect that ran
+            # first has unlinked by now, and one that runs later sees the ref
+            with transaction.atomic():
+                retain(blob_name, sha256, size)
+                os.replace(temp_path, final_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return blob_name
+
+    def get_available_name(self, name, max_length=None):
+        # The final name only depends on the content, which is not known yet
+        return name
+
+    def release(self, name):
+        """
+        Drops one reference to `name`. The file is deleted after commit if it
+        was the last one. Files saved before this storage existed have no Blob
+        row and are left alone.
+        """
+        if not name or not name.startswith(BLOB_PREFIX + '/'):
+            return
+        from .models import Blob
+
+        Blob.objects.filter(name=name).update(ref_count=F('ref_count') - 1, updated_at=timezone.now())
+        transaction.on_commit(lambda: self.collect(name))
+
+    def collect(self, name):
+        from .models import Blob
+
+        # Unlinked before the row's deletion commits, so an upload of the same
+        # content waits for the lock and then writes the file back
+        with transaction.atomic():
+            if Blob.objects.filter(name=name, ref_count__lte=0).delete()[0]:
+                self.delete(name)
+
+
+def retain(name, sha256, size):
+    from .models import Blob
+
+    # The owning row is saved after this; updated_at tells collect_blobs not to
+    # recount the blob before that row had time to commit
+    if Blob.objects.filter(name=name).update(ref_count=F('ref_count') + 1, updated_at=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            Blob.objects.create(name=name, sha256=sha256, size=size, ref_count=1)
+    except IntegrityError:
+        # Another upload of the same content created the row first
+        Blob.objects.filter(name=name).update(ref_count=F('ref_count') + 1, updated_at=timezone.now())
+
+
+attachment_storage = ContentAddressedStorage()
+
+
+def get_attachment_storage():
+    # Referenced by the model fields (and their migrations) instead of the instance
+    return attachment_storage
@@ -0,0 +1,215 @@
+"""
+A database-backed task queue, so requests can hand off side effects and
+return at once without an outside broker.
+
+    @task(max_attempts=3)
+    def send_welcome_email(user_id):
+        ...
+
+    enqueue(send_welcome_email, user_id=user.pk, key=f'welcome:{user.pk}')
+
+The task row is inserted in the caller's transaction, so work is only queued
+if the request's changes commit. `manage.py runworker` claims due tasks with a
+conditional UPDATE (safe with any number of workers), runs them in a thread
+pool and reschedules failures with exponential backoff until max_attempts.
+Tasks are run at least once: a worker that dies mid-task loses its lease and
+the task runs again, so task bodies should be safe to repeat.
+
+With TASKS_EAGER = True tasks run in-process right after the commit instead,
+which suits tests and development without a worker.
+"""
+import logging
+import random
+import threading
+import traceback
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 5
+# Seconds: the first retry waits BACKOFF_BASE, doubling up to BACKOFF_MAX
+BACKOFF_BASE = 10
+BACKOFF_MAX = 60 * 60
+# A task still running after this long is presumed lost and handed out again
+LEASE_SECONDS = 5 * 60
+
+
+class TaskError(Exception):
+    pass
+
+
+def task(max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Registers a module-level function as a task; its kwargs must be JSON-serializable."""
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__qualname__}'
+        func.max_attempts = max_attempts
+        return func
+    return decorator
+
+
+def resolve(name):
+    func = import_string(name)
+    if getattr(func, 'task_name', None) != name:
+        raise TaskError(f'{name} is not a registered task.')
+    return func
+
+
+def enqueue(func, key=None, delay=0, **kwargs):
+    """
+    Queues `func(**kwargs)`. Returns the Task, or the existing one when a task
+    with the same idempotency `key` was queued before and not purged yet.
+    """
+    if not getattr(func, 'task_name', None):
+        raise TaskError(f'{func!r} is not a registered task.')
+    if settings.TASKS_EAGER:
+        transaction.on_commit(lambda: func(**kwargs))
+        return None
+    new = Task(name=func.task_name, kwargs=kwargs, idempotency_key=key, max_attempts=func.max_attempts,
+               run_at=timezone.now() + timedelta(seconds=delay))
+    if key is None:
+        new.save()
+        return new
+    try:
+        # The savepoint keeps a duplicate key from breaking the caller's transaction
+        with transaction.atomic():
+            new.save()
+        return new
+    except IntegrityError:
+        return Task.objects.get(idempotency_key=key)
+
+
+def backoff(attempts):
+    """Seconds before retry number `attempts`, with jitter so failures do not retry in lockstep."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return delay * random.uniform(0.75, 1.25)
+
+
+def claimable(now):
+    return Q(status='queued', run_at__lte=now) | Q(
+        status='running', locked_until__lt=now, attempts__lt=F('max_attempts'),
+    )
+
+
+def fail_abandoned(now):
+    """
+    Fails tasks whose lease ran out on their last attempt. A task that kills
+    its worker never records an outcome, so this is where its attempts end.
+    """
+    return Task.objects.filter(status='running', locked_until__lt=now, attempts__gte=F('max_attempts')).update(
+        status='failed', finished_at=now, locked_by='', locked_until=None,
+        last_error='The lease expired on the last attempt; the worker running it may have died.',
+    )
+
+
+def claim(worker_id, limit, lease=LEASE_SECONDS):
+    """
+    Leases up to `limit` due tasks to this worker. The UPDATE re-checks that
+    each task is still claimable, so two workers never get the same one.
+    """
+    now = timezone.now()
+    # Also picks up expired leases on their last attempt, so the UPDATE that
+    # fails them only runs on the rare poll that finds one
+    rows = list(Task.objects.filter(claimable(now) | Q(status='running', locked_until__lt=now))
+                .order_by('run_at').values_list('pk', 'status', 'attempts', 'max_attempts')[:limit])
+    candidates = [pk for pk, status, attempts, max_attempts in rows
+                  if status == 'queued' or attempts < max_attempts]
+    if len(candidates) < len(rows):
+        fail_abandoned(now)
+    if not candidates:
+        return []
+    token = f'{worker_id}:{uuid.uuid4().hex[:12]}'
+    Task.objects.filter(claimable(now), pk__in=candidates).update(
+        status='running', locked_by=token, locked_until=now + timedelta(seconds=lease), attempts=F('attempts') + 1,
+    )
+    return list(Task.objects.filter(locked_by=token, status='running'))
+
+
+def run_task(task_row):
+    """Runs one claimed task and records the outcome. Returns True on success."""
+    try:
+        resolve(task_row.name)(**task_row.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Task %s #%s failed (attempt %s of %s)', task_row.name, task_row.pk,
+                       task_row.attempts, task_row.max_attempts)
+        if task_row.attempts >= task_row.max_attempts:
+            updates = {'status': 'failed', 'finished_at': timezone.now()}
+        else:
+            updates = {'status': 'queued', 'run_at': timezone.now() + timedelta(seconds=backoff(task_row.attempts))}
+        finish(task_row, last_error=error, **updates)
+        return False
+    finish(task_row, status='done', finished_at=timezone.now(), last_error='')
+    return True
+
+
+def finish(task_row, **updates):
+    # Only the lease holder may record the outcome; a task whose lease expired
+    # and was handed to another worker belongs to that worker now
+    Task.objects.filter(pk=task_row.pk, locked_by=task_row.locked_by).update(
+        locked_by='', locked_until=None, **updates,
+    )
+
+
+def run_in_worker(task_row):
+    # Pool threads are not request threads: nothing else closes their connection
+    close_old_connections()
+    try:
+        return run_task(task_row)
+    finally:
+        close_old_connections()
+
+
+class Worker:
+    """Polls the queue and runs tasks on `threads` pool threads until stopped."""
+
+    def __init__(self, threads=4, poll_interval=1.0, lease=LEASE_SECONDS):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.worker_id = f'{threading.get_native_id()}-{uuid.uuid4().hex[:8]}'
+        self.stopping = threading.Event()
+        self.processed = 0
+
+    def stop(self):
+        self.stopping.set()
+
+    def run(self, burst=False):
+        """Works until stop() is called, or, with `burst`, until the queue has nothing due."""
+        running = set()
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='tasks') as pool:
+            while not self.stopping.is_set():
+                # Like a request boundary: drops a connection past CONN_MAX_AGE or broken
+                close_old_connections()
+                free = self.threads - len(running)
+                claimed = claim(self.worker_id, free, self.lease) if free else []
+                for task_row in claimed:
+                    running.add(pool.submit(run_in_worker, task_row))
+                if running:
+                    done, running = wait(running, timeout=0 if claimed else self.poll_interval,
+                                         return_when=FIRST_COMPLETED)
+                    self.processed += len(done)
+                elif burst:
+                    break
+                else:
+                    self.stopping.wait(self.poll_interval)
+            wait(running)
+            self.processed += len(running)
+        close_old_connections()
+        return self.processed
+
+
+def purge(older_than_days=7):
+    """Deletes finished tasks; failed ones are kept for inspection."""
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = Task.objects.filter(status='done', finished_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,36 @@
+from django import template
+
+from core.fragments import get_or_render
+
+register = template.Library()
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, name, dependencies):
+        self.nodelist = nodelist
+        self.name = name
+        self.dependencies = dependencies
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        dependencies = [dep.resolve(context) for dep in self.dependencies]
+        return get_or_render(name, dependencies, lambda: self.nodelist.render(context))
+
+
+@register.tag
+def cachefragment(parser, token):
+    """
+    Caches the enclosed block until one of the model instances it depends on
+    is saved or deleted:
+
+        {% cachefragment "job_card" job %}...{% endcachefragment %}
+
+    Plain values (like a page number) are part of the key without being
+    versioned. Never wrap {% csrf_token %} or other per-user output.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name.")
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+    return FragmentCacheNode(nodelist, parser.compile_filter(bits[1]), [parser.compile_filter(bit) for bit in bits[2:]])
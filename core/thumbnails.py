@@ -0,0 +1,120 @@
+import hashlib
+import logging
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .fragments import invalidate
+from .models import Profile
+from .taskqueue import enqueue, task
+
+logger = logging.getLogger(__name__)
+
+# Square edge lengths, in pixels, of the renditions made for every picture
+RENDITION_SIZES = (40, 150, 400)
+# Pillow format name, file extension and encoder options
+RENDITION_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+def rendition_name(source_name, size, fmt):
+    """
+    profile_pictures/me.png -> profile_pictures/renditions/<hash>_150.webp,
+    hashing the whole source name: me.png and me.jpg are different uploads.
+    """
+    directory = posixpath.dirname(source_name)
+    digest = hashlib.sha1(source_name.encode()).hexdigest()[:16]
+    return posixpath.join(directory, 'renditions', f'{digest}_{size}.{fmt}')
+
+
+def render_rendition(image, size, fmt):
+    pil_format, options = RENDITION_FORMATS[fmt]
+    thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    thumbnail.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def generate_renditions(source_name, storage=default_storage):
+    """Writes every size/format rendition of `source_name`; returns their names."""
+    with storage.open(source_name, 'rb') as source:
+        image = Image.open(source)
+        # Phone photos are often stored sideways with an EXIF rotation flag
+        image = ImageOps.exif_transpose(image)
+        # Neither JPEG nor our WebP settings keep alpha or palettes
+        image = image.convert('RGB')
+
+    names = []
+    for size in RENDITION_SIZES:
+        for fmt in RENDITION_FORMATS:
+            name = rendition_name(source_name, size, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(render_rendition(image, size, fmt)))
+            names.append(name)
+    return names
+
+
+def delete_renditions(source_name, storage=default_storage):
+    for size in RENDITION_SIZES:
+        for fmt in RENDITION_FORMATS:
+            name = rendition_name(source_name, size, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+
+
+@task(max_attempts=3)
+def publish_renditions(profile_id, source_name):
+    """
+    Task queue entry point; errors propagate so the queue retries. Renditions
+    are only published (thumbnail_source set) if the profile still points at
+    the picture they were made from; a newer upload will have queued its own job.
+    """
+    generate_renditions(source_name)
+    previous = Profile.objects.filter(pk=profile_id).values_list('thumbnail_source', 'user_id').first()
+    updated = Profile.objects.filter(pk=profile_id, profile_picture=source_name).update(thumbnail_source=source_name)
+    if not updated:
+        delete_renditions(source_name)
+        return
+    old_source, user_id = previous
+    if old_source and old_source != source_name:
+        delete_renditions(old_source)
+    invalidate(f'v:profile:{user_id}')
+
+
+def process_profile_picture(profile_id, source_name):
+    try:
+        publish_renditions(profile_id, source_name)
+    except Exception:
+        logger.exception('Could not generate renditions of %s', source_name)
+
+
+def schedule_renditions(profile):
+    """Queues rendition generation; the task only becomes visible once the upload commits."""
+    profile_id, source_name = profile.pk, profile.profile_picture.name
+    if settings.THUMBNAIL_ASYNC:
+        enqueue(publish_renditions, key=f'renditions:{profile_id}:{source_name}',
+                profile_id=profile_id, source_name=source_name)
+    else:
+        transaction.on_commit(lambda: process_profile_picture(profile_id, source_name))
+
+
+def rendition_url(profile, size, fmt='jpeg'):
+    """
+    URL of the smallest rendition at least `size` pixels wide, falling back to
+    the original upload until the renditions are ready.
+    """
+    picture = profile.profile_picture
+    if not picture:
+        return None
+    if profile.thumbnail_source != picture.name:
+        return picture.url
+    fitting = [s for s in RENDITION_SIZES if s >= size]
+    chosen = fitting[0] if fitting else RENDITION_SIZES[-1]
+    return default_storage.url(rendition_name(picture.name, chosen, fmt))
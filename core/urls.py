@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.home, name='home'),
@@ -11,6 +11,9 @@ urlpatterns = [
     # Messaging URLs
     path('proposals/<int:pk>/accept/', views.accept_proposal, name='accept_proposal'),
     path('threads/<int:pk>/', views.thread_detail, name='thread_detail'),
+    path('threads/<int:pk>/messages/older/', views.thread_messages_older, name='thread_messages_older'),
+    path('threads/<int:pk>/messages/since/', views.thread_messages_since, name='thread_messages_since'),
+    path('threads/<int:pk>/events/', views.thread_events, name='thread_events'),
     # User Profile Edit
     path('profile/edit/', views.profile_edit, name='profile_edit'),
     path('profile/<str:username>/', views.profile_view, name='profile_view'),
@@ -24,4 +27,16 @@ urlpatterns = [
     path('choose-role/', views.choose_role, name='choose_role'),
 
     path('jobs/<int:pk>/complete/', views.mark_job_complete, name='mark_job_complete'),
+    path('notifications/', views.notification_list, name='notifications'),
+    # Read-only JSON API (core.api)
+    path('api/v1/jobs/', api.job_feed, name='api_jobs'),
+    path('api/v1/jobs/<int:pk>/', api.job_detail, name='api_job'),
+    path('api/v1/jobs/<int:pk>/proposals/', api.job_proposals, name='api_job_proposals'),
+    path('api/v1/threads/', api.thread_list, name='api_threads'),
+    path('api/v1/threads/<int:pk>/messages/', api.thread_messages, name='api_thread_messages'),
+    # Staff-only request profiling report
+    path('perf/', views.perf_report, name='perf_report'),
+    # Staff-only bulk import/export of jobs and profiles
+    path('staff/<str:kind>/import/', views.bulk_import, name='bulk_import'),
+    path('staff/<str:kind>/export/', views.bulk_export, name='bulk_export'),
 ]
\ No newline at end of file
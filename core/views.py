@@ -1,14 +1,44 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from django.db.models import Q
+import posixpath
+from decimal import Decimal, InvalidOperation
+
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import Http404
+from django.views.decorators.http import require_POST, require_safe
+from django.utils.functional import SimpleLazyObject
+from django.core.paginator import Paginator
 from django.contrib.auth import login
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from .forms import UserSignUpForm, JobForm, ProposalForm, ProfileUpdateForm, MessageForm, ReviewForm
-from django.db.models import Avg
+from django.db import transaction
 from .models import Profile, Job, Proposal, Thread, Message, Review
+from . import bulk
+from .dashboards import CLIENT_JOB_FILTERS, client_jobs_page, freelancer_proposals_page, freelancer_status_counts
+from . import hiring, notifications
+from .fragments import stats as fragment_stats
+from .media import accessible_upload_name, is_protected, serve_file
+from .messaging import message_window, messages_since, serialize_message, thread_event_stream
+from .pagination import KeysetPaginator, KnownCountPaginator
+from .profiling import store as profiling_store
+from .ranking import SORT_CHOICES as PROPOSAL_SORTS, ranked_proposals
+from .ratings import add_rating
+from .recommendations import recommended_jobs
+from .roles import client_required, remember_role, role_required
+from .search import get_search_backend
 from django import forms
 
+JOBS_PER_PAGE = 20
+SEARCH_RESULTS_PER_PAGE = 12
+REVIEWS_PER_PAGE = 10
+NOTIFICATIONS_PER_PAGE = 20
+
 
 def home(request):
     return render(request, 'home.html')
@@ -27,19 +57,17 @@ def signup(request):
 
     return render(request, 'registration/signup.html', {'form': form})
 
-# A helper function to check if a user is a client
-def is_client(user):
-    return user.is_authenticated and user.profile.role == 'client'
-
-
 @login_required
 def job_list(request):
-    jobs = Job.objects.filter(is_open=True).order_by('-created_at')
-    return render(request, 'core/job_list.html', {'jobs': jobs})
+    jobs = Job.objects.filter(is_open=True).select_related('client').prefetch_related('skill_tags')
+    skill = request.GET.get('skill')
+    if skill:
+        jobs = jobs.filter(skill_tags__slug=skill)
+    page = KeysetPaginator(jobs, JOBS_PER_PAGE).page(request.GET.get('after'))
+    return render(request, 'core/job_list.html', {'jobs': page, 'page': page, 'skill': skill})
 
 
-@login_required
-@user_passes_test(is_client) # Only clients can access this view
+@client_required
 def job_create(request):
     if request.method == 'POST':
         form = JobForm(request.POST)
@@ -53,18 +81,13 @@ def job_create(request):
     return render(request, 'core/job_create.html', {'form': form})
 
 
-# A helper function to check if a user is a freelancer
-def is_freelancer(user):
-    return user.is_authenticated and user.profile.role == 'freelancer'
-
-
 @login_required
 def job_detail(request, pk):
     job = get_object_or_404(Job, pk=pk)
 
     existing_proposal = Proposal.objects.filter(job=job, freelancer=request.user).first()
-    is_freelancer_user = is_freelancer(request.user)
-    is_client_owner = is_client(request.user) and job.client == request.user
+    is_freelancer_user = request.role == 'freelancer'
+    is_client_owner = request.role == 'client' and job.client_id == request.user.pk
 
     if request.method == 'POST' and is_freelancer_user:
         # Pass request.FILES to the form for file uploads
@@ -74,14 +97,14 @@ def job_detail(request, pk):
             proposal.job = job
             proposal.freelancer = request.user
             proposal.save()
+            notifications.proposal_submitted(proposal)
             return redirect('job_detail', pk=job.pk)
     else:
         # This runs on a GET request or if the POST request is invalid
         form = ProposalForm()
 
-    review = None
-    if job.status == 'completed':
-        review = job.reviews.first()
+    # Only evaluated if the cached review fragment has to be rendered
+    review = SimpleLazyObject(lambda: job.reviews.select_related('client').first())
 
     context = {
         'job': job,
@@ -93,6 +116,16 @@ def job_detail(request, pk):
         'review': review,
         # --- End of context update ---
     }
+    if is_client_owner:
+        sort = request.GET.get('sort')
+        sort = sort if sort in dict(PROPOSAL_SORTS) else 'score'
+        proposal_page, shortlist = ranked_proposals(job, sort, request.GET.get('page'))
+        context.update({
+            'proposal_page': proposal_page,
+            'shortlist': shortlist,
+            'sort': sort,
+            'sorts': PROPOSAL_SORTS,
+        })
     return render(request, 'core/job_detail.html', context)
 
 
@@ -113,16 +146,18 @@ def mark_job_complete(request, pk):
     if request.method == 'POST':
         form = ReviewForm(request.POST)
         if form.is_valid():
-            review = form.save(commit=False)
-            review.job = job
-            review.client = request.user
-            review.freelancer = accepted_proposal.freelancer
-            review.save()
-
-            # Update job status
-            job.status = 'completed'
-            job.is_open = False
-            job.save()
+            with transaction.atomic():
+                review = form.save(commit=False)
+                review.job = job
+                review.client = request.user
+                review.freelancer = accepted_proposal.freelancer
+                review.save()
+                add_rating(review.freelancer_id, review.rating)
+
+                # Update job status
+                job.status = 'completed'
+                job.is_open = False
+                job.save()
 
             return redirect('job_detail', pk=job.pk)
     else:
@@ -162,60 +197,65 @@ def job_edit(request, pk):
     return render(request, 'core/job_edit.html', {'form': form, 'job': job})
 
 
-@login_required
+def render_client_dashboard(request):
+    status = request.GET.get('status')
+    page = client_jobs_page(request.user, status=status, cursor=request.GET.get('after'))
+    context = {
+        'jobs': page,
+        'page': page,
+        'status': status if status in CLIENT_JOB_FILTERS else '',
+        'status_filters': CLIENT_JOB_FILTERS,
+    }
+    return render(request, 'core/client_dashboard.html', context)
+
+
+@client_required
 def client_dashboard(request):
-    posted_jobs = request.user.posted_jobs.all()
-    return render(request, 'core/client_dashboard.html', {'posted_jobs': posted_jobs})
+    return render_client_dashboard(request)
 
 
-@login_required
+@role_required('client', 'freelancer')
 def dashboard(request):
-    if request.user.profile.role == 'client':
-        # Get jobs posted by the client
-        jobs = request.user.posted_jobs.all().order_by('-created_at')
-        return render(request, 'core/client_dashboard.html', {'jobs': jobs})
+    if request.role == 'client':
+        return render_client_dashboard(request)
     else: # Freelancer
-        # Get proposals submitted by the freelancer
-        proposals = request.user.proposals.all().order_by('-created_at')
-        return render(request, 'core/freelancer_dashboard.html', {'proposals': proposals})
+        status = request.GET.get('status')
+        page = freelancer_proposals_page(request.user, status=status, cursor=request.GET.get('after'))
+        context = {
+            'proposals': page,
+            'page': page,
+            'status': status if status in dict(Proposal.STATUS_CHOICES) else '',
+            'status_counts': freelancer_status_counts(request.user),
+            'recommended_jobs': recommended_jobs(request.user),
+        }
+        return render(request, 'core/freelancer_dashboard.html', context)
 
 
 # New helper function to check if the user is the thread participant
 def is_thread_participant(user, thread):
-    return user == thread.client or user == thread.freelancer
+    # Compare ids so the check never loads the participants
+    return user.pk in (thread.client_id, thread.freelancer_id)
 
 
-@login_required
-@user_passes_test(is_client)
+@client_required
+@require_POST
 def accept_proposal(request, pk):
     proposal = get_object_or_404(Proposal, pk=pk)
-    # Only the job owner can accept a proposal
-    if request.user != proposal.job.client:
-        return redirect('job_detail', pk=proposal.job.pk)
-
-    # Mark the proposal as accepted
-    proposal.status = 'accepted'
-    proposal.save()
-
-    # Close the job and reject all other pending proposals
-    proposal.job.is_open = False
-    proposal.job.save()
-    Proposal.objects.filter(job=proposal.job, status='pending').update(status='rejected')
-
-    # Create a new message thread
-    thread, created = Thread.objects.get_or_create(
-        job=proposal.job,
-        client=proposal.job.client,
-        freelancer=proposal.freelancer
-    )
-
-    return redirect('thread_detail', pk=thread.pk)
+    try:
+        acceptance = hiring.accept_proposal(proposal, request.user)
+    except hiring.ProposalNotAcceptable as exc:
+        messages.error(request, str(exc))
+        return redirect('job_detail', pk=proposal.job_id)
+    notifications.proposal_accepted(acceptance)
+    return redirect('thread_detail', pk=acceptance.thread.pk)
 
 
 @login_required
 def thread_detail(request, pk):
-    thread = get_object_or_404(Thread, pk=pk)
-    messages = thread.messages.all()
+    thread = get_object_or_404(Thread.objects.select_related('job'), pk=pk)
+    if not is_thread_participant(request.user, thread):
+        return redirect('dashboard')
+    is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
 
     if request.method == 'POST':
         form = MessageForm(request.POST, request.FILES)
@@ -224,16 +264,82 @@ def thread_detail(request, pk):
             message.thread = thread
             message.sender = request.user
             message.save()
+            notifications.message_posted(message)
+            if is_ajax:
+                return JsonResponse({'message': serialize_message(message)}, status=201)
             return redirect('thread_detail', pk=thread.pk)
+        if is_ajax:
+            return JsonResponse({'errors': form.errors}, status=400)
     else:
         form = MessageForm()
+        # Reading the thread reads its notification; the cached count spares the UPDATE otherwise
+        if notifications.unread_count(request.user):
+            notifications.mark_read(request.user, group=f'thread:{thread.pk}')
 
-    return render(request, 'core/thread_detail.html', {'thread': thread, 'messages': messages, 'form': form})
+    # Only the latest window is rendered; older messages load on demand
+    window = message_window(thread)
+    messages = window.object_list[::-1]
+    context = {
+        'thread': thread,
+        'messages': messages,
+        'form': form,
+        'older_cursor': window.next_cursor,
+        'last_message_id': messages[-1].pk if messages else 0,
+    }
+    return render(request, 'core/thread_detail.html', context)
+
+
+@login_required
+async def thread_events(request, pk):
+    if not isinstance(request, ASGIRequest):
+        # A stream would pin a sync worker for its whole life; 204 tells the
+        # browser's EventSource not to reconnect, and the page falls back to polling
+        return HttpResponse(status=204)
+
+    user = await request.auser()
+    thread = await aget_object_or_404(Thread, pk=pk)
+    if not is_thread_participant(user, thread):
+        return HttpResponseForbidden()
+    try:
+        after_id = int(request.headers.get('Last-Event-ID') or request.GET['after_id'])
+    except (KeyError, ValueError):
+        after_id = None
+
+    response = StreamingHttpResponse(thread_event_stream(thread, after_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+def thread_messages_older(request, pk):
+    thread = get_object_or_404(Thread, pk=pk)
+    if not is_thread_participant(request.user, thread):
+        return HttpResponseForbidden()
+
+    window = message_window(thread, before=request.GET.get('before'))
+    html = render_to_string('core/thread_messages.html', {'messages': window.object_list[::-1]}, request=request)
+    return JsonResponse({'html': html, 'next_cursor': window.next_cursor})
+
+
+@login_required
+def thread_messages_since(request, pk):
+    thread = get_object_or_404(Thread, pk=pk)
+    if not is_thread_participant(request.user, thread):
+        return HttpResponseForbidden()
+    try:
+        after_id = int(request.GET.get('after_id', 0))
+    except ValueError:
+        return HttpResponseBadRequest('after_id must be an integer')
+
+    messages = messages_since(thread, after_id)
+    html = render_to_string('core/thread_messages.html', {'messages': messages}, request=request) if messages else ''
+    return JsonResponse({'messages': [serialize_message(m) for m in messages], 'html': html})
 
 
 def profile_view(request, username):
-    user = get_object_or_404(User, username=username)
-    user_profile = user.profile
+    user_profile = get_object_or_404(Profile.objects.select_related('user'), user__username=username)
+    user = user_profile.user
 
     context = {
         'user_profile': user_profile,
@@ -243,10 +349,12 @@ def profile_view(request, username):
         context['posted_jobs'] = user.posted_jobs.all()
 
     elif user_profile.role == 'freelancer':
-        # Calculate the average rating and get all reviews
-        avg_rating = user.received_reviews.aggregate(Avg('rating'))['rating__avg']
-        context['average_rating'] = round(avg_rating, 2) if avg_rating else 0
-        context['received_reviews'] = user.received_reviews.all().order_by('-created_at')
+        # The average is kept on the profile by core.ratings; only one page of reviews is loaded
+        context['average_rating'] = user_profile.rating_avg
+        reviews = user.received_reviews.select_related('client').order_by('-created_at', '-pk')
+        page_obj = KnownCountPaginator(reviews, REVIEWS_PER_PAGE, user_profile.rating_count).get_page(request.GET.get('page'))
+        context['received_reviews'] = page_obj.object_list
+        context['page_obj'] = page_obj
 
     return render(request, 'core/profile_view.html', context)
 
@@ -256,7 +364,9 @@ def profile_edit(request):
     if request.method == 'POST':
         form = ProfileUpdateForm(request.POST, request.FILES, instance=request.user.profile)
         if form.is_valid():
-            form.save()
+            profile = form.save()
+            # Refresh the session's cached role from the saved profile
+            remember_role(request, profile.role)
             return redirect('profile_view', username=request.user.username)
     else:
         form = ProfileUpdateForm(instance=request.user.profile)
@@ -264,35 +374,87 @@ def profile_edit(request):
     return render(request, 'core/profile_edit.html', {'form': form})
 
 
+@login_required
+def notification_list(request):
+    if request.method == 'POST':
+        notifications.mark_read(request.user)
+        return redirect('notifications')
+    page = KeysetPaginator(request.user.notifications.all(), NOTIFICATIONS_PER_PAGE).page(request.GET.get('after'))
+    return render(request, 'core/notifications.html', {'notifications': page, 'page': page})
+
+
+@user_passes_test(lambda user: user.is_staff)
+def perf_report(request):
+    # Aggregates from this worker process only
+    return JsonResponse({'views': profiling_store.report(), 'fragment_cache': fragment_stats()})
+
+
+EXPORT_CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'jsonl': 'application/x-ndjson; charset=utf-8'}
+
+
+@user_passes_test(lambda user: user.is_staff)
+@require_POST
+def bulk_import(request, kind):
+    if kind not in bulk.IMPORTERS:
+        raise Http404
+    upload = request.FILES.get('file')
+    if upload is None:
+        return HttpResponseBadRequest('Upload a CSV or JSONL file as "file".')
+    fmt = request.POST.get('format') or bulk.guess_format(upload.name)
+    if fmt not in bulk.FORMATS:
+        return HttpResponseBadRequest('Unknown format.')
+    # Large uploads are spooled to a temporary file and read back a line at a time
+    report = bulk.IMPORTERS[kind](upload, fmt)
+    return JsonResponse(report.as_dict(), status=200 if not report.errors else 207)
+
+
+@user_passes_test(lambda user: user.is_staff)
+@require_safe
+def bulk_export(request, kind):
+    fmt = request.GET.get('format', 'csv')
+    if kind not in bulk.EXPORTERS or fmt not in bulk.FORMATS:
+        raise Http404
+    response = StreamingHttpResponse(bulk.export_lines(kind, fmt), content_type=EXPORT_CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    return response
+
+
 def search(request):
     query = request.GET.get('q', '')
     search_type = request.GET.get('search_type', 'talent')
+    skill = request.GET.get('skill', '')
+    sort = request.GET.get('sort', 'relevance')
+    try:
+        min_rating = Decimal(request.GET.get('min_rating') or 0)
+    except InvalidOperation:
+        min_rating = Decimal(0)
+    # Decimal accepts NaN and Infinity, which the rating filter cannot compare with
+    if not min_rating.is_finite():
+        min_rating = Decimal(0)
+    min_rating = min(max(min_rating, Decimal(0)), Decimal(5))
 
     results = []
-    if query:
+    page_obj = None
+    if query or skill or min_rating:
+        backend = get_search_backend()
         if search_type == 'talent':
-            results = Profile.objects.filter(
-                role='freelancer',
-                user__is_active=True
-            ).filter(
-                Q(skills__icontains=query) |
-                Q(bio__icontains=query) |
-                Q(title__icontains=query) |
-                Q(user__username__icontains=query)
-            ).distinct()
-        elif search_type == 'jobs':
-            results = Job.objects.select_related('client').filter(
-                is_open=True
-            ).filter(
-                Q(title__icontains=query) |
-                Q(description__icontains=query) |
-                Q(skills_required__icontains=query)
-            ).distinct()
+            if query:
+                results = backend.search_talent(query, skill=skill, min_rating=min_rating, sort=sort)
+            else:
+                results = backend.browse_talent(skill=skill, min_rating=min_rating, sort=sort)
+        elif search_type == 'jobs' and (query or skill):
+            results = backend.search_jobs(query, skill=skill) if query else backend.browse_jobs(skill)
+        page_obj = Paginator(results, SEARCH_RESULTS_PER_PAGE).get_page(request.GET.get('page'))
+        results = page_obj.object_list
 
     context = {
         'query': query,
         'search_type': search_type,
+        'skill': skill,
+        'sort': sort,
+        'min_rating': min_rating,
         'results': results,
+        'page_obj': page_obj,
     }
     return render(request, 'core/search_results.html', context)
 
@@ -308,7 +470,7 @@ class RoleForm(forms.Form):
 @login_required
 def choose_role(request):
     # Check if a profile already exists to prevent duplicate creation
-    if Profile.objects.filter(user=request.user).exists():
+    if request.role is not None:
         return redirect('home')  # Or their profile page
 
     if request.method == 'POST':
@@ -316,8 +478,30 @@ def choose_role(request):
         if form.is_valid():
             role = form.cleaned_data['role']
             Profile.objects.create(user=request.user, role=role)
+            remember_role(request, role)
             return redirect('profile_view', username=request.user.username)
     else:
         form = RoleForm()
 
-    return render(request, 'core/choose_role.html', {'form': form})
\ No newline at end of file
+    return render(request, 'core/choose_role.html', {'form': form})
+
+
+@require_safe
+def serve_media(request, path):
+    name = posixpath.normpath(path)
+    # Normalize before the permission check so "x/../blobs/..." cannot dodge it
+    if name.startswith(('/', '../')) or name in ('.', '..'):
+        raise Http404
+
+    filename = ''
+    protected = is_protected(name)
+    if protected:
+        filename = accessible_upload_name(request.user, name)
+        if filename is None:
+            if not request.user.is_authenticated:
+                return redirect_to_login(request.get_full_path())
+            return HttpResponseForbidden("You do not have access to this file.")
+    try:
+        return serve_file(request, default_storage, name, filename, protected)
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError, SuspiciousFileOperation):
+        raise Http404
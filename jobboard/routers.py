@@ -0,0 +1,29 @@
+from django.db import connections
+
+
+class ReadWriteRouter:
+    """
+    Sends reads to the read-only `replica` connection and writes to `default`
+    (see SQLITE_READ_CONNECTION in jobboard/database.py). Both open the same
+    SQLite file in WAL mode, so committed writes are visible to the next read;
+    reads made inside a transaction on `default` stay there to see its own
+    uncommitted writes.
+    """
+
+    read_alias = 'replica'
+    write_alias = 'default'
+
+    def db_for_read(self, model, **hints):
+        if connections[self.write_alias].in_atomic_block:
+            return self.write_alias
+        return self.read_alias
+
+    def db_for_write(self, model, **hints):
+        return self.write_alias
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data behind both aliases
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == self.write_alias
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 
+from .database import TRUE_VALUES, database_config, sqlite_read_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,12 +50,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfileRoleMiddleware',
+    'core.middleware.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
@@ -76,6 +81,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.notifications',
             ],
         },
     },
@@ -86,15 +92,115 @@ WSGI_APPLICATION = 'jobboard.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# Configured from DATABASE_URL and friends; see jobboard/database.py.
 
 DATABASES = {
+    'default': database_config(f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
+}
+
+if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+    # A file rather than the default in-memory database, whose shared cache
+    # fails concurrent writers at once instead of making them wait; the
+    # concurrency tests need the production locking behaviour
+    DATABASES['default']['TEST'] = {'NAME': BASE_DIR / 'test_db.sqlite3'}
+    if os.environ.get('SQLITE_READ_CONNECTION', '').lower() in TRUE_VALUES:
+        DATABASES['replica'] = sqlite_read_config(DATABASES['default'])
+        DATABASE_ROUTERS = ['jobboard.routers.ReadWriteRouter']
+
+
+# Caches
+# The fragment cache is file-based so every gunicorn worker sees the same
+# invalidations; MAX_ENTRIES bounds it and culls a quarter when full.
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'fragments',
+        'TIMEOUT': 600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+            'CULL_FREQUENCY': 4,
+        },
+    },
+}
+
+FRAGMENT_CACHE_ALIAS = 'fragments'
+
+# Swaps the caches above for in-memory ones while the tests run
+TEST_RUNNER = 'jobboard.test_runner.TestRunner'
+
+
+# Full-text search backend used by core.views.search. SQLiteFTSBackend needs the
+# FTS5 tables from migration 0009, so other databases use DatabaseSearchBackend.
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', (
+    'core.search.SQLiteFTSBackend' if DATABASES['default']['ENGINE'].endswith('sqlite3')
+    else 'core.search.DatabaseSearchBackend'
+))
+
+
+# Pub/sub transport for the thread event streams (core.views.thread_events).
+# LocalBroker only reaches subscribers in the same process.
+REALTIME_BROKER = 'core.realtime.LocalBroker'
+# Seconds between keepalive comments on an idle event stream
+REALTIME_KEEPALIVE = 15
+
+
+# Deferred work (core.taskqueue) is stored in the database and run by
+# `manage.py runworker`. TASKS_EAGER = True runs it in-process after the
+# commit instead, for development without a worker.
+TASKS_EAGER = os.environ.get('TASKS_EAGER', 'off').lower() in TRUE_VALUES
+
+
+# Profile picture renditions (core.thumbnails) are made by the task queue after
+# the upload commits; set THUMBNAIL_ASYNC = False to make them inline.
+THUMBNAIL_ASYNC = True
+
+
+# Notifications (core.notifications) are emailed as one digest per user per
+# interval, by the task queue; links in the emails point at SITE_URL.
+NOTIFICATION_DIGEST_INTERVAL = 15 * 60
+SITE_URL = os.environ.get('SITE_URL', 'http://127.0.0.1:8000')
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'TalentLink <no-reply@talentlink.local>')
+
+
+# Seconds a job's proposal ranking (core.ranking) is cached for its client; new
+# proposals refresh it at once, rating changes when it expires. 0 disables it.
+PROPOSAL_RANKING_CACHE_TIMEOUT = 300
+
+
+# Rate limits (core.ratelimit) by URL name, per user or, for anonymous
+# requests, per IP. Over the limit a request gets a 429 with Retry-After.
+# LocalMemoryStore counts per process; 'core.ratelimit.CacheStore' counts in
+# the RATE_LIMIT_CACHE cache, shared by every worker that uses it.
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'on').lower() in TRUE_VALUES
+RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'core.ratelimit.LocalMemoryStore')
+RATE_LIMIT_CACHE = 'default'
+# Proxies in front of the app that append to X-Forwarded-For. Without one the
+# client writes that header itself, so it is ignored unless this is set
+# (RATE_LIMIT_TRUSTED_PROXIES=1 in the Render environment)
+RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', 0))
+RATE_LIMITS = {
+    'signup': {'rate': '5/h', 'methods': ['POST']},
+    # Proposal submission
+    'job_detail': {'rate': '20/h', 'burst': 5, 'methods': ['POST']},
+    'thread_detail': {'rate': '30/m', 'burst': 10, 'methods': ['POST']},
+    'search': {'rate': '60/m', 'burst': 20},
 }
 
 
+# Request profiling (core.middleware.QueryProfilingMiddleware). When enabled, a
+# PROFILING_SAMPLE_RATE share of requests is measured; per-view percentiles are
+# served at /perf/ (staff only) and by `manage.py perf_report` if a log file is set.
+PROFILING_ENABLED = False
+PROFILING_SAMPLE_RATE = 0.05
+PROFILING_N_PLUS_ONE_THRESHOLD = 5
+PROFILING_MAX_SAMPLES = 1000
+PROFILING_LOG_FILE = None
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -149,6 +255,12 @@ LOGOUT_REDIRECT_URL = '/'
 # handling media
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# How core.views.serve_media sends files once access is checked: 'django'
+# streams them with FileResponse (sendfile under gunicorn); 'x-accel' (nginx)
+# and 'x-sendfile' (Apache, lighttpd) leave it, and Range requests, to the proxy.
+# For nginx, MEDIA_ACCEL_PREFIX must be an `internal` location aliasing MEDIA_ROOT.
+MEDIA_SERVE_MODE = 'django'
+MEDIA_ACCEL_PREFIX = '/protected-media/'
 
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
@@ -0,0 +1,33 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+# Every cache in memory, so test runs never read or overwrite the fragments a
+# development server has on disk (and never leave test data behind for it)
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test-default',
+    },
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test-fragments',
+        'TIMEOUT': 600,
+    },
+}
+
+
+class TestRunner(DiscoverRunner):
+    """
+    DiscoverRunner with the caches swapped for in-memory ones for the whole
+    run, and rate limiting off: the buckets live for the whole process, so
+    limits would trip depending on test order. Rate limit tests turn it on.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = override_settings(CACHES=TEST_CACHES, RATE_LIMIT_ENABLED=False)
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)